@@ -248,6 +248,8 @@ class Actor:
         self._inbox: asyncio.Queue[ActorMessage] = asyncio.Queue()
         # Conversation history (for this actor's LLM context)
         self._messages: List[ActorMessage] = []
+        # Set whenever a message is received; lets watchers wait instead of polling
+        self._message_signal = asyncio.Event()
         # Result (set when actor terminates)
         self._result: Optional[str] = None
         # Task handle (for async execution)
@@ -328,6 +330,7 @@ class Actor:
     async def send(self, message: ActorMessage):
         """Receive a message from another actor."""
         self._messages.append(message)
+        self._message_signal.set()
         await self._inbox.put(message)
         logger.debug(f"Actor {self.id} received message from {message.sender}: {message.content[:50]}...")
 
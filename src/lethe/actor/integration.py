@@ -47,6 +47,10 @@ SUBAGENT_DEFAULT_TOOLS = {
     'list_directory', 'grep_search', 'view_image',
 }
 
+# Fallback re-check interval for the principal monitor (it normally wakes on
+# the principal's message signal)
+PRINCIPAL_MONITOR_INTERVAL = 1.0
+
 
 class ActorSystem:
     """Manages the actor system, wiring it into the existing Agent.
@@ -262,8 +266,17 @@ class ActorSystem:
         async def _monitor():
             while True:
                 try:
-                    await asyncio.sleep(1.0)
-                    if not self.principal or self.principal.state == ActorState.TERMINATED:
+                    if not self.principal:
+                        await asyncio.sleep(PRINCIPAL_MONITOR_INTERVAL)
+                        continue
+                    # Wake as soon as the principal receives a message
+                    signal = self.principal._message_signal
+                    try:
+                        await asyncio.wait_for(signal.wait(), timeout=PRINCIPAL_MONITOR_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    signal.clear()
+                    if self.principal.state == ActorState.TERMINATED:
                         continue
                     all_messages = self.principal._messages
                     if self._last_principal_message_idx >= len(all_messages):
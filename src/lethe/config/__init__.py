@@ -1,5 +1,6 @@
 """Configuration management."""
 
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
@@ -24,12 +25,10 @@ class Settings(BaseSettings):
         description="Comma-separated list of allowed Telegram user IDs (empty = allow all)",
     )
 
-    @property
-    def allowed_user_ids(self) -> list[int]:
-        """Parse allowed user IDs from comma-separated string."""
-        if not self.telegram_allowed_user_ids.strip():
-            return []
-        return [int(x.strip()) for x in self.telegram_allowed_user_ids.split(",") if x.strip()]
+    @cached_property
+    def allowed_user_ids(self) -> frozenset[int]:
+        """Parse allowed user IDs from comma-separated string (parsed once)."""
+        return frozenset(int(x) for x in self.telegram_allowed_user_ids.split(",") if x.strip())
 
     # LLM
     openrouter_api_key: Optional[str] = Field(
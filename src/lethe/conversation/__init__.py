@@ -19,7 +19,7 @@ logger = logging.getLogger(__name__)
 DEFAULT_DEBOUNCE_SECONDS = 5.0
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingMessage:
     """A message waiting to be processed."""
     content: str
@@ -123,8 +123,8 @@ class Heartbeat:
     
     async def _send_heartbeat(self):
         """Send a heartbeat message to the agent."""
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
         now = datetime.now(timezone.utc)
+        timestamp = now.strftime("%Y-%m-%d %H:%M UTC")
         
         # Get active reminders
         reminders_text = ""
@@ -16,7 +16,7 @@ from rich.logging import RichHandler
 from lethe.agent import Agent
 from lethe.config import get_settings
 from lethe.conversation import ConversationManager
-from lethe.telegram import TelegramBot
+from lethe.telegram import MessageCoalescer, TelegramBot
 from lethe.heartbeat import Heartbeat
 from lethe import console as lethe_console
 
@@ -137,6 +137,10 @@ async def run():
         # Start typing indicator
         await telegram_bot.start_typing(chat_id)
         
+        # Intermediate updates are delivered in the background so the agent
+        # doesn't wait on Telegram between steps
+        outgoing = MessageCoalescer(lambda text: telegram_bot.send_message(chat_id, text))
+        
         try:
             # Callback for intermediate messages (reasoning/thinking)
             async def on_intermediate(content: str):
@@ -147,13 +151,14 @@ async def run():
                 if interrupt_check():
                     return
                 # Send thinking/reasoning as-is (no emoji prefix)
-                await telegram_bot.send_message(chat_id, content)
+                outgoing.add(content)
             
             # Callback for image attachments (screenshots, etc.)
             async def on_image(image_path: str):
                 """Send image to user."""
                 if interrupt_check():
                     return
+                await outgoing.flush()
                 await telegram_bot.send_photo(chat_id, image_path)
             
             # Get response from agent
@@ -165,13 +170,19 @@ async def run():
                 return
             
             # Send response
+            await outgoing.flush()
             logger.info(f"Sending response ({len(response)} chars): {response[:80]}...")
             await telegram_bot.send_message(chat_id, response)
             
         except Exception as e:
+            # Queued updates must not arrive after the error
+            outgoing.discard()
             logger.exception(f"Error processing message: {e}")
             await telegram_bot.send_message(chat_id, f"Error: {e}")
         finally:
+            # No-op after a flush; on interrupt or cancellation (/stop), drops
+            # updates the user no longer wants
+            outgoing.discard()
             await telegram_bot.stop_typing(chat_id)
             clear_telegram_context()
 
@@ -370,6 +381,14 @@ def main():
 
     setup_logging(verbose=args.verbose)
 
+    # Use uvloop when it happens to be installed; it's optional, not a dependency
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+
     try:
         asyncio.run(run())
     except KeyboardInterrupt:
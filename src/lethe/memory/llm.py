@@ -1483,19 +1483,14 @@ class AsyncLLMClient:
         Returns:
             Response string
         """
+        import asyncio
+        
         # Build minimal messages (just system + heartbeat message)
         messages = [
             {"role": "system", "content": HEARTBEAT_SYSTEM_PROMPT},
             {"role": "user", "content": message},
         ]
         
-        # Get task + file tools for heartbeat (reflection needs file access)
-        task_tools = []
-        heartbeat_keywords = ["todo", "task", "remind", "calendar", "read_file", "write_file", "edit_file", "list_directory", "grep_search"]
-        for name, (func, schema) in self._tools.items():
-            if any(kw in name.lower() for kw in heartbeat_keywords):
-                task_tools.append({"type": "function", "function": schema})
-        
         kwargs = {
             "model": self.config.model_aux,  # Use aux model
             "messages": messages,
@@ -1531,12 +1526,11 @@ class AsyncLLMClient:
                     
                     if func:
                         try:
-                            import json, asyncio
-                            args = json.loads(tool_call["function"]["arguments"])
+                            # Sync tools (bash, file ops) run in a thread so they don't block the loop
                             if asyncio.iscoroutinefunction(func):
-                                tool_result = await func(**args)
+                                tool_result = await func(**tool_args)
                             else:
-                                tool_result = func(**args)
+                                tool_result = await asyncio.to_thread(func, **tool_args)
                         except Exception as e:
                             tool_result = f"Error: {e}"
                     else:
@@ -10,15 +10,18 @@ user pastes the redirect URL back.
 import asyncio
 import base64
 import hashlib
+import hmac
+import importlib.util
 import json
 import logging
 import os
 import secrets
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional, Callable, Awaitable
-from urllib.parse import urlencode, parse_qs, urlparse
+from urllib.parse import unquote_plus, urlencode
 
 import httpx
 
@@ -34,9 +37,15 @@ CLIENT_ID = "9d1c250a-e61b-44d9-88ed-5944d1962f5e"
 # Redirect URI - uses localhost but user will copy the URL manually for remote setups
 REDIRECT_URI = "http://localhost:19532/callback"
 
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 # Token storage
 DEFAULT_TOKEN_PATH = Path("~/.config/lethe/claude_tokens.json").expanduser()
 
+# Seconds to wait before retrying a failed proactive (background) refresh
+BACKGROUND_REFRESH_RETRY = 60
+
 # Claude Code CLI credentials path
 CLAUDE_CODE_CREDENTIALS = Path("~/.claude/.credentials.json").expanduser()
 
@@ -80,6 +89,10 @@ class OAuthTokens:
         """Check if access token is expired (with 5 min buffer)."""
         return datetime.now(timezone.utc) >= self.expires_at - timedelta(minutes=5)
     
+    def expires_soon(self) -> bool:
+        """Check if access token should be refreshed proactively (10 min buffer)."""
+        return datetime.now(timezone.utc) >= self.expires_at - timedelta(minutes=10)
+    
     def to_dict(self) -> dict:
         return {
             "access_token": self.access_token,
@@ -96,6 +109,13 @@ class OAuthTokens:
         )
 
 
+@dataclass(slots=True, frozen=True)
+class _PendingAuth:
+    """PKCE verifier and state for an in-progress auth flow."""
+    verifier: str
+    state: str
+
+
 def generate_pkce_pair() -> tuple[str, str]:
     """Generate PKCE code verifier and challenge."""
     # Generate random code verifier (43-128 chars, URL-safe)
@@ -108,6 +128,22 @@ def generate_pkce_pair() -> tuple[str, str]:
     return verifier, challenge
 
 
+def _parse_callback_params(redirect_url: str) -> dict[str, str]:
+    """Extract query parameters from an OAuth redirect URL.
+    
+    Only the query string is parsed; the first value wins for repeated keys.
+    """
+    _, _, query = redirect_url.partition("?")
+    query, _, _ = query.partition("#")
+    params: dict[str, str] = {}
+    for pair in query.split("&"):
+        if not pair:
+            continue
+        key, _, value = pair.partition("=")
+        params.setdefault(unquote_plus(key), unquote_plus(value))
+    return params
+
+
 class ClaudeOAuth:
     """Handles Claude Max OAuth authentication.
     
@@ -133,7 +169,12 @@ class ClaudeOAuth:
         self._tokens: Optional[OAuthTokens] = None
         self._send_message = send_message
         self._receive_message = receive_message
-        self._pending_auth: Optional[dict] = None  # Stores verifier/state during auth
+        self._pending_auth: Optional[_PendingAuth] = None  # Stores verifier/state during auth
+        self._client: Optional[httpx.AsyncClient] = None
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_retry_at = 0.0  # time.monotonic() after a failed background refresh
+        self._auth_lock = asyncio.Lock()  # Serializes ensure_claude_max_auth logins
         self._load_tokens()
     
     def _load_tokens(self):
@@ -165,11 +206,33 @@ class ClaudeOAuth:
         """Save tokens to disk."""
         if self._tokens:
             self.token_path.parent.mkdir(parents=True, exist_ok=True)
-            self.token_path.write_text(json.dumps(self._tokens.to_dict(), indent=2))
-            # Secure file permissions
-            os.chmod(self.token_path, 0o600)
+            data = json.dumps(self._tokens.to_dict(), indent=2).encode()
+            # Create the temp file as 0600 so tokens are never world-readable,
+            # then rename so readers never see a partially written file
+            tmp_path = self.token_path.with_name(self.token_path.name + ".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                os.fchmod(fd, 0o600)  # O_CREAT mode is ignored if a stale temp file exists
+                f.write(data)
+            os.replace(tmp_path, self.token_path)
             logger.info("Saved Claude OAuth tokens")
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get or create the HTTP client for the token endpoint."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                timeout=30.0,
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the HTTP client."""
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
     def has_valid_tokens(self) -> bool:
         """Check if we have valid (or refreshable) tokens."""
         return self._tokens is not None
@@ -180,64 +243,93 @@ class ClaudeOAuth:
             raise ValueError("No OAuth tokens - run authenticate() first")
         
         if self._tokens.is_expired():
-            await self._refresh_tokens()
+            async with self._refresh_lock:
+                # Another caller may have refreshed while we waited
+                if not self._tokens or self._tokens.is_expired():
+                    await self._refresh_tokens()
+        elif (
+            self._tokens.expires_soon()
+            and self._refresh_task is None
+            and time.monotonic() >= self._refresh_retry_at
+        ):
+            # Still valid: refresh in the background and return the current token
+            self._refresh_task = asyncio.create_task(self._background_refresh())
         
         return self._tokens.access_token
     
-    async def _refresh_tokens(self):
-        """Refresh expired access token using refresh token."""
+    async def _background_refresh(self):
+        """Refresh tokens ahead of expiry without blocking callers."""
+        try:
+            async with self._refresh_lock:
+                if self._tokens and self._tokens.expires_soon():
+                    await self._refresh_tokens(background=True)
+        except Exception as e:
+            # The current token is still valid; keep it and try again later
+            logger.warning(f"Background token refresh failed: {e}")
+            self._refresh_retry_at = time.monotonic() + BACKGROUND_REFRESH_RETRY
+        finally:
+            self._refresh_task = None
+    
+    async def _refresh_tokens(self, background: bool = False):
+        """Refresh expired access token using refresh token.
+        
+        Stored tokens are only discarded when a blocking refresh is
+        rejected (400/401). A background refresh runs while the access
+        token is still valid, so its failures never touch the stored tokens.
+        """
         if not self._tokens:
             raise ValueError("No tokens to refresh")
         
         logger.info("Refreshing Claude OAuth access token...")
         
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.post(
-                TOKEN_URL,
-                json={
-                    "grant_type": "refresh_token",
-                    "refresh_token": self._tokens.refresh_token,
-                    "client_id": CLIENT_ID,
-                },
-                headers={
-                    "Content-Type": "application/json",
-                    "User-Agent": "Lethe/1.0",
-                },
-                timeout=30.0,
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Token refresh failed: {response.text}")
-                # Clear tokens so we know they're invalid
+        client = self._get_client()
+        response = await client.post(
+            TOKEN_URL,
+            json={
+                "grant_type": "refresh_token",
+                "refresh_token": self._tokens.refresh_token,
+                "client_id": CLIENT_ID,
+            },
+            headers={
+                "Content-Type": "application/json",
+                "User-Agent": "Lethe/1.0",
+            },
+            timeout=30.0,
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"Token refresh failed: {response.text}")
+            if not background and response.status_code in (400, 401):
+                # Refresh token rejected: clear tokens so we know they're invalid
                 self._tokens = None
                 if self.token_path.exists():
                     self.token_path.unlink()
-                raise ValueError(
-                    f"Token refresh failed ({response.status_code}). "
-                    "Please re-authenticate: run 'claude login' and restart Lethe."
-                )
-            
-            data = response.json()
-            self._tokens = OAuthTokens(
-                access_token=data["access_token"],
-                refresh_token=data.get("refresh_token", self._tokens.refresh_token),
-                expires_at=datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 28800)),
+            raise ValueError(
+                f"Token refresh failed ({response.status_code}). "
+                "Please re-authenticate: run 'claude login' and restart Lethe."
             )
-            self._save_tokens()
-            
-            # Also update Claude Code credentials if we got a new refresh token
-            if "refresh_token" in data and CLAUDE_CODE_CREDENTIALS.exists():
-                try:
-                    cc_data = json.loads(CLAUDE_CODE_CREDENTIALS.read_text())
-                    cc_data["claudeAiOauth"]["accessToken"] = data["access_token"]
-                    cc_data["claudeAiOauth"]["refreshToken"] = data["refresh_token"]
-                    cc_data["claudeAiOauth"]["expiresAt"] = int(self._tokens.expires_at.timestamp() * 1000)
-                    CLAUDE_CODE_CREDENTIALS.write_text(json.dumps(cc_data))
-                    logger.info("Updated Claude Code credentials")
-                except Exception as e:
-                    logger.warning(f"Failed to update Claude Code credentials: {e}")
-            
-            logger.info("Token refresh successful")
+        
+        data = response.json()
+        self._tokens = OAuthTokens(
+            access_token=data["access_token"],
+            refresh_token=data.get("refresh_token", self._tokens.refresh_token),
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 28800)),
+        )
+        self._save_tokens()
+        
+        # Also update Claude Code credentials if we got a new refresh token
+        if "refresh_token" in data and CLAUDE_CODE_CREDENTIALS.exists():
+            try:
+                cc_data = json.loads(CLAUDE_CODE_CREDENTIALS.read_text())
+                cc_data["claudeAiOauth"]["accessToken"] = data["access_token"]
+                cc_data["claudeAiOauth"]["refreshToken"] = data["refresh_token"]
+                cc_data["claudeAiOauth"]["expiresAt"] = int(self._tokens.expires_at.timestamp() * 1000)
+                CLAUDE_CODE_CREDENTIALS.write_text(json.dumps(cc_data))
+                logger.info("Updated Claude Code credentials")
+            except Exception as e:
+                logger.warning(f"Failed to update Claude Code credentials: {e}")
+        
+        logger.info("Token refresh successful")
     
     def start_auth_flow(self) -> str:
         """Start OAuth flow and return the authorization URL.
@@ -254,10 +346,7 @@ class ClaudeOAuth:
         state = secrets.token_urlsafe(16)
         
         # Store for later verification
-        self._pending_auth = {
-            "verifier": verifier,
-            "state": state,
-        }
+        self._pending_auth = _PendingAuth(verifier=verifier, state=state)
         
         # Build authorization URL
         params = {
@@ -285,52 +374,51 @@ class ClaudeOAuth:
             raise ValueError("No pending auth flow - call start_auth_flow() first")
         
         # Parse the redirect URL
-        parsed = urlparse(redirect_url)
-        params = parse_qs(parsed.query)
+        params = _parse_callback_params(redirect_url)
         
-        auth_code = params.get("code", [None])[0]
-        received_state = params.get("state", [None])[0]
+        auth_code = params.get("code")
+        received_state = params.get("state")
         
         if not auth_code:
             # Check for error
-            error = params.get("error", [None])[0]
-            error_desc = params.get("error_description", ["Unknown error"])[0]
+            error = params.get("error")
+            error_desc = params.get("error_description", "Unknown error")
             raise ValueError(f"OAuth error: {error} - {error_desc}")
         
         # Verify state
-        if received_state != self._pending_auth["state"]:
+        if not hmac.compare_digest(received_state or "", self._pending_auth.state):
             raise ValueError("OAuth state mismatch - possible CSRF attack")
         
         # Exchange code for tokens
-        verifier = self._pending_auth["verifier"]
+        verifier = self._pending_auth.verifier
         self._pending_auth = None  # Clear pending auth
         
         logger.info("Exchanging authorization code for tokens...")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                TOKEN_URL,
-                json={
-                    "grant_type": "authorization_code",
-                    "client_id": CLIENT_ID,
-                    "code": auth_code,
-                    "redirect_uri": REDIRECT_URI,
-                    "code_verifier": verifier,
-                },
-                timeout=30.0,
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Token exchange failed: {response.text}")
-                raise ValueError(f"Token exchange failed: {response.status_code}")
-            
-            data = response.json()
-            self._tokens = OAuthTokens(
-                access_token=data["access_token"],
-                refresh_token=data["refresh_token"],
-                expires_at=datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 28800)),
-            )
-            self._save_tokens()
+        client = self._get_client()
+        response = await client.post(
+            TOKEN_URL,
+            json={
+                "grant_type": "authorization_code",
+                "client_id": CLIENT_ID,
+                "code": auth_code,
+                "redirect_uri": REDIRECT_URI,
+                "code_verifier": verifier,
+            },
+            timeout=30.0,
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"Token exchange failed: {response.text}")
+            raise ValueError(f"Token exchange failed: {response.status_code}")
+        
+        data = response.json()
+        self._tokens = OAuthTokens(
+            access_token=data["access_token"],
+            refresh_token=data["refresh_token"],
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=data.get("expires_in", 28800)),
+        )
+        self._save_tokens()
         
         logger.info("Claude Max authentication successful!")
         return self._tokens.access_token
@@ -359,10 +447,17 @@ class ClaudeOAuth:
             "4. Paste it here.\n\n"
             "_The URL will look like: http://localhost:19532/callback?code=...&state=..._"
         )
-        await self._send_message(message)
+        # Start listening for the reply before sending, so the listener
+        # setup overlaps with the send round-trip
+        receive_task = asyncio.create_task(self._receive_message())
+        try:
+            await self._send_message(message)
+        except BaseException:
+            receive_task.cancel()
+            raise
         
         # Wait for user to paste the redirect URL
-        redirect_url = await self._receive_message()
+        redirect_url = await receive_task
         
         # Complete the flow
         try:
@@ -436,15 +531,20 @@ class ClaudeOAuth:
         # Start local server
         server = await asyncio.start_server(handle_callback, "localhost", 19532)
         
-        print("\n" + "=" * 60)
-        print("CLAUDE MAX AUTHENTICATION")
-        print("=" * 60)
-        print("\nOpening browser for authentication...")
-        print(f"\nIf browser doesn't open, visit:\n{auth_url}\n")
-        print("Waiting for authentication...")
-        print("=" * 60)
+        rule = "=" * 60
+        print(
+            f"\n{rule}\n"
+            "CLAUDE MAX AUTHENTICATION\n"
+            f"{rule}\n"
+            "\nOpening browser for authentication...\n"
+            f"\nIf browser doesn't open, visit:\n{auth_url}\n\n"
+            "Waiting for authentication...\n"
+            f"{rule}",
+            flush=True,
+        )
         
-        webbrowser.open(auth_url)
+        # xdg-open and friends can block; keep the event loop free
+        await asyncio.to_thread(webbrowser.open, auth_url)
         
         try:
             # Wait for callback (5 minute timeout)
@@ -479,6 +579,11 @@ class ClaudeOAuth:
         return await self.complete_auth_flow(redirect_url)
 
 
+# One ClaudeOAuth per token file, so repeated calls reuse already-loaded tokens
+_oauth_instances: dict[Path, ClaudeOAuth] = {}
+_oauth_lock = asyncio.Lock()
+
+
 async def ensure_claude_max_auth(
     token_path: Optional[Path] = None,
     send_message: Optional[Callable[[str], Awaitable[None]]] = None,
@@ -489,25 +594,43 @@ async def ensure_claude_max_auth(
     If tokens exist and are valid/refreshable, returns immediately.
     Otherwise, runs OAuth flow (via Telegram if callbacks provided).
     
+    Instances are cached per resolved token path, so tokens are only read
+    from disk on the first call.
+    
     Args:
         token_path: Path to store tokens
         send_message: Async function to send messages (for Telegram flow)
         receive_message: Async function to receive user input (for Telegram flow)
     """
-    oauth = ClaudeOAuth(
-        token_path=token_path,
-        send_message=send_message,
-        receive_message=receive_message,
-    )
+    key = (token_path or DEFAULT_TOKEN_PATH).resolve()
     
-    if oauth.has_valid_tokens():
-        # Try to get token (will refresh if needed)
-        try:
-            await oauth.get_access_token()
-            return oauth
-        except Exception as e:
-            logger.warning(f"Existing tokens invalid: {e}")
+    # The module lock only guards the cache; a login can take minutes, so it
+    # is serialized per instance and never blocks other token paths
+    async with _oauth_lock:
+        oauth = _oauth_instances.get(key)
+        if oauth is None:
+            oauth = ClaudeOAuth(
+                token_path=token_path,
+                send_message=send_message,
+                receive_message=receive_message,
+            )
+            _oauth_instances[key] = oauth
+        else:
+            # Callbacks may differ between callers; keep the latest ones
+            if send_message:
+                oauth._send_message = send_message
+            if receive_message:
+                oauth._receive_message = receive_message
     
-    # Need fresh authentication
-    await oauth.authenticate()
-    return oauth
+    async with oauth._auth_lock:
+        if oauth.has_valid_tokens():
+            # Try to get token (will refresh if needed)
+            try:
+                await oauth.get_access_token()
+                return oauth
+            except Exception as e:
+                logger.warning(f"Existing tokens invalid: {e}")
+        
+        # Need fresh authentication
+        await oauth.authenticate()
+        return oauth
@@ -2,16 +2,102 @@
 
 import asyncio
 import json
+import os
+import time
 import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Final, Optional, Sequence
 
 import aiosqlite
 
 
+def _uuid7() -> str:
+    """Generate a time-ordered UUIDv7 (RFC 9562).
+
+    Ids sort by creation time, so inserts append to the end of the primary
+    key index instead of landing at random pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+
+def _dump_metadata(metadata: dict[str, Any]) -> Optional[str]:
+    """Serialize task metadata compactly; empty metadata is stored as NULL."""
+    if not metadata:
+        return None
+    return json.dumps(metadata, separators=(",", ":"))
+
+
+# Max number of tasks kept by TaskQueue.get_task's read cache
+TASK_CACHE_SIZE = 256
+
+# Read-only connections used alongside the single writer (WAL allows both)
+READER_POOL_SIZE = 2
+
+# SQL statements, kept as constants so every call hits sqlite3's statement cache.
+# started_at/completed_at are stamped by SQLite (UTC, ISO 8601, ms precision)
+# rather than formatted in Python.
+_SQL_NOW: Final = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+# Explicit column list so rows can be unpacked positionally in Task.from_row
+_TASK_COLUMNS: Final = (
+    "id, chat_id, user_id, message, status, result, error,"
+    " created_at, started_at, completed_at, metadata"
+)
+
+_SQL_INSERT_TASK: Final = """
+    INSERT INTO tasks (id, chat_id, user_id, message, status, created_at, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Atomically claim the oldest pending task
+_SQL_CLAIM_NEXT: Final = f"""
+    UPDATE tasks SET status = ?, started_at = {_SQL_NOW}
+    WHERE id = (
+        SELECT id FROM tasks
+        WHERE status = ?
+        ORDER BY created_at ASC
+        LIMIT 1
+    )
+    RETURNING {_TASK_COLUMNS}
+"""
+
+# Atomically claim up to N of the oldest pending tasks
+_SQL_CLAIM_BATCH: Final = f"""
+    UPDATE tasks SET status = ?, started_at = {_SQL_NOW}
+    WHERE id IN (
+        SELECT id FROM tasks
+        WHERE status = ?
+        ORDER BY created_at ASC
+        LIMIT ?
+    )
+    RETURNING {_TASK_COLUMNS}
+"""
+
+_SQL_COMPLETE: Final = f"""
+    UPDATE tasks SET status = ?, result = ?, completed_at = {_SQL_NOW}
+    WHERE id = ?
+"""
+
+_SQL_FAIL: Final = f"""
+    UPDATE tasks SET status = ?, error = ?, completed_at = {_SQL_NOW}
+    WHERE id = ?
+"""
+
+_SQL_GET_TASK: Final = f"SELECT {_TASK_COLUMNS} FROM tasks WHERE id = ?"
+
+_SQL_COUNT_BY_STATUS: Final = "SELECT COUNT(*) FROM tasks WHERE status = ?"
+
+_SQL_STATS: Final = "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+
+
 class TaskStatus(str, Enum):
     PENDING = "pending"
     RUNNING = "running"
@@ -19,7 +105,11 @@ class TaskStatus(str, Enum):
     FAILED = "failed"
 
 
-@dataclass
+# Value -> member table; a dict hit is cheaper than TaskStatus(value)
+_STATUS_BY_VALUE: Final = {status.value: status for status in TaskStatus}
+
+
+@dataclass(slots=True)
 class Task:
     """A task to be processed by the agent."""
 
@@ -47,25 +137,28 @@ class Task:
             "created_at": self.created_at.isoformat(),
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-            "metadata": json.dumps(self.metadata),
+            "metadata": _dump_metadata(self.metadata),
         }
 
     @classmethod
-    def from_row(cls, row: aiosqlite.Row) -> "Task":
+    def from_row(cls, row: Sequence[Any]) -> "Task":
+        """Build a Task from a row selected with _TASK_COLUMNS."""
+        (
+            task_id, chat_id, user_id, message, status, result, error,
+            created_at, started_at, completed_at, metadata,
+        ) = row
         return cls(
-            id=row["id"],
-            chat_id=row["chat_id"],
-            user_id=row["user_id"],
-            message=row["message"],
-            status=TaskStatus(row["status"]),
-            result=row["result"],
-            error=row["error"],
-            created_at=datetime.fromisoformat(row["created_at"]),
-            started_at=datetime.fromisoformat(row["started_at"]) if row["started_at"] else None,
-            completed_at=(
-                datetime.fromisoformat(row["completed_at"]) if row["completed_at"] else None
-            ),
-            metadata=json.loads(row["metadata"]) if row["metadata"] else {},
+            id=task_id,
+            chat_id=chat_id,
+            user_id=user_id,
+            message=message,
+            status=_STATUS_BY_VALUE[status],
+            result=result,
+            error=error,
+            created_at=datetime.fromisoformat(created_at),
+            started_at=datetime.fromisoformat(started_at) if started_at else None,
+            completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
+            metadata=json.loads(metadata) if metadata else {},
         )
 
 
@@ -74,16 +167,38 @@ class TaskQueue:
 
     def __init__(self, db_path: Path):
         self.db_path = db_path
-        self._db: Optional[aiosqlite.Connection] = None
-        self._new_task_event = asyncio.Event()
+        self._db: Optional[aiosqlite.Connection] = None  # Writer
+        self._readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._reader_conns: list[aiosqlite.Connection] = []
+        # Wakes one waiting consumer per enqueued task. The counter lets a
+        # consumer notice tasks added while it was querying the database.
+        self._task_added = asyncio.Condition()
+        self._enqueued_count = 0
+        # get_task read cache; every write to a task evicts its entry
+        self._task_cache: OrderedDict[str, Task] = OrderedDict()
+        self._write_epoch = 0  # Bumped on every write; guards cache fills
 
     async def initialize(self):
         """Initialize the database connection and schema."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._db = await aiosqlite.connect(self.db_path)
-        self._db.row_factory = aiosqlite.Row
 
-        await self._db.execute("""
+        # WAL + synchronous=NORMAL: commits no longer fsync every time, and
+        # readers don't block the writer. A crash loses nothing; a power cut
+        # may lose the most recent commits.
+        await self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA cache_size = -20000;
+            PRAGMA busy_timeout = 5000;
+        """)
+
+        # Schema and indexes in one script/transaction instead of one
+        # aiosqlite round-trip per statement
+        await self._db.executescript("""
+            BEGIN;
+
             CREATE TABLE IF NOT EXISTS tasks (
                 id TEXT PRIMARY KEY,
                 chat_id INTEGER NOT NULL,
@@ -96,21 +211,43 @@ class TaskQueue:
                 started_at TEXT,
                 completed_at TEXT,
                 metadata TEXT
-            )
-        """)
+            );
 
-        await self._db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)
-        """)
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+            CREATE INDEX IF NOT EXISTS idx_tasks_chat_id ON tasks(chat_id);
 
-        await self._db.execute("""
-            CREATE INDEX IF NOT EXISTS idx_tasks_chat_id ON tasks(chat_id)
+            -- Serves the dequeue scan (status filter + created_at order) without a sort
+            CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks(status, created_at);
+
+            COMMIT;
         """)
 
-        await self._db.commit()
+        # Reads go through their own connections so they don't queue behind
+        # writes on the writer's aiosqlite thread
+        for _ in range(READER_POOL_SIZE):
+            reader = await aiosqlite.connect(self.db_path)
+            await reader.executescript("""
+                PRAGMA query_only = ON;
+                PRAGMA busy_timeout = 5000;
+            """)
+            self._reader_conns.append(reader)
+            self._readers.put_nowait(reader)
+
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool."""
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
 
     async def close(self):
-        """Close the database connection."""
+        """Close the database connections."""
+        for reader in self._reader_conns:
+            await reader.close()
+        self._reader_conns.clear()
+        self._readers = asyncio.Queue()
         if self._db:
             await self._db.close()
             self._db = None
@@ -124,7 +261,7 @@ class TaskQueue:
     ) -> Task:
         """Add a new task to the queue."""
         task = Task(
-            id=str(uuid.uuid4()),
+            id=_uuid7(),
             chat_id=chat_id,
             user_id=user_id,
             message=message,
@@ -132,10 +269,7 @@ class TaskQueue:
         )
 
         await self._db.execute(
-            """
-            INSERT INTO tasks (id, chat_id, user_id, message, status, created_at, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
+            _SQL_INSERT_TASK,
             (
                 task.id,
                 task.chat_id,
@@ -143,99 +277,124 @@ class TaskQueue:
                 task.message,
                 task.status.value,
                 task.created_at.isoformat(),
-                json.dumps(task.metadata),
+                _dump_metadata(task.metadata),
             ),
         )
         await self._db.commit()
 
-        # Signal that a new task is available
-        self._new_task_event.set()
+        # Wake exactly one waiting consumer
+        async with self._task_added:
+            self._enqueued_count += 1
+            self._task_added.notify(1)
 
         return task
 
     async def dequeue(self, timeout: Optional[float] = None) -> Optional[Task]:
         """Get the next pending task, waiting if necessary."""
         while True:
-            # Try to get a pending task
+            seen = self._enqueued_count
             async with self._db.execute(
-                """
-                SELECT * FROM tasks
-                WHERE status = ?
-                ORDER BY created_at ASC
-                LIMIT 1
-                """,
-                (TaskStatus.PENDING.value,),
+                _SQL_CLAIM_NEXT, (TaskStatus.RUNNING.value, TaskStatus.PENDING.value)
             ) as cursor:
                 row = await cursor.fetchone()
+            await self._db.commit()
 
             if row:
                 task = Task.from_row(row)
-                # Mark as running
-                task.status = TaskStatus.RUNNING
-                task.started_at = datetime.now(timezone.utc)
-
-                await self._db.execute(
-                    """
-                    UPDATE tasks SET status = ?, started_at = ?
-                    WHERE id = ?
-                    """,
-                    (task.status.value, task.started_at.isoformat(), task.id),
-                )
-                await self._db.commit()
+                self._write_epoch += 1
+                self._task_cache.pop(task.id, None)
                 return task
 
             # No task available, wait for signal or timeout
-            self._new_task_event.clear()
-            try:
-                await asyncio.wait_for(self._new_task_event.wait(), timeout=timeout)
-            except asyncio.TimeoutError:
-                return None
+            async with self._task_added:
+                if self._enqueued_count != seen:
+                    continue  # Something was enqueued during the claim; retry
+                try:
+                    await asyncio.wait_for(self._task_added.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return None
+
+    async def dequeue_batch(self, limit: int) -> list[Task]:
+        """Claim up to `limit` pending tasks at once, oldest first.
+
+        Does not wait; returns an empty list when nothing is pending.
+        """
+        if limit <= 0:
+            return []
+        async with self._db.execute(
+            _SQL_CLAIM_BATCH, (TaskStatus.RUNNING.value, TaskStatus.PENDING.value, limit)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        await self._db.commit()
+
+        self._write_epoch += 1
+        tasks = [Task.from_row(row) for row in rows]
+        for task in tasks:
+            self._task_cache.pop(task.id, None)
+        # RETURNING order is unspecified
+        tasks.sort(key=lambda t: t.created_at)
+        return tasks
 
     async def complete(self, task_id: str, result: str):
         """Mark a task as completed."""
         await self._db.execute(
-            """
-            UPDATE tasks SET status = ?, result = ?, completed_at = ?
-            WHERE id = ?
-            """,
-            (
-                TaskStatus.COMPLETED.value,
-                result,
-                datetime.now(timezone.utc).isoformat(),
-                task_id,
-            ),
+            _SQL_COMPLETE,
+            (TaskStatus.COMPLETED.value, result, task_id),
         )
         await self._db.commit()
+        self._write_epoch += 1
+        self._task_cache.pop(task_id, None)
 
     async def fail(self, task_id: str, error: str):
         """Mark a task as failed."""
         await self._db.execute(
-            """
-            UPDATE tasks SET status = ?, error = ?, completed_at = ?
-            WHERE id = ?
-            """,
-            (
-                TaskStatus.FAILED.value,
-                error,
-                datetime.now(timezone.utc).isoformat(),
-                task_id,
-            ),
+            _SQL_FAIL,
+            (TaskStatus.FAILED.value, error, task_id),
         )
         await self._db.commit()
+        self._write_epoch += 1
+        self._task_cache.pop(task_id, None)
 
     async def get_task(self, task_id: str) -> Optional[Task]:
-        """Get a task by ID."""
-        async with self._db.execute(
-            "SELECT * FROM tasks WHERE id = ?", (task_id,)
-        ) as cursor:
-            row = await cursor.fetchone()
-            return Task.from_row(row) if row else None
+        """Get a task by ID.
+
+        Repeated reads are served from an in-memory cache until the task is
+        next written; treat the returned Task as read-only.
+        """
+        task = self._task_cache.get(task_id)
+        if task is not None:
+            self._task_cache.move_to_end(task_id)
+            return task
+
+        epoch = self._write_epoch
+        async with self._reader() as db:
+            async with db.execute(_SQL_GET_TASK, (task_id,)) as cursor:
+                row = await cursor.fetchone()
+        if not row:
+            return None
+
+        task = Task.from_row(row)
+        if epoch != self._write_epoch:
+            return task  # A write landed during the read; don't cache a stale row
+        self._task_cache[task_id] = task
+        if len(self._task_cache) > TASK_CACHE_SIZE:
+            self._task_cache.popitem(last=False)
+        return task
 
     async def get_pending_count(self) -> int:
         """Get the number of pending tasks."""
-        async with self._db.execute(
-            "SELECT COUNT(*) FROM tasks WHERE status = ?",
-            (TaskStatus.PENDING.value,),
-        ) as cursor:
-            row = await cursor.fetchone()
-            return row[0]
+        async with self._reader() as db:
+            async with db.execute(
+                _SQL_COUNT_BY_STATUS, (TaskStatus.PENDING.value,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0]
+
+    async def get_stats(self) -> dict[str, int]:
+        """Get task counts per status in a single grouped query."""
+        stats = dict.fromkeys(_STATUS_BY_VALUE, 0)
+        async with self._reader() as db:
+            async with db.execute(_SQL_STATS) as cursor:
+                async for status, count in cursor:
+                    stats[status] = count
+        return stats
@@ -2,19 +2,137 @@
 
 import asyncio
 import logging
-from typing import Callable, Optional
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
 
-from aiogram import Bot, Dispatcher, F
+from aiogram import BaseMiddleware, Bot, Dispatcher, F
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode, ChatAction
 from aiogram.filters import Command, CommandStart
-from aiogram.types import Message
+from aiogram.types import Message, TelegramObject
 
 from lethe.config import Settings, get_settings
 from lethe.conversation import ConversationManager
 
 logger = logging.getLogger(__name__)
 
+MAX_MESSAGE_LENGTH = 4000  # Telegram limit is 4096
+DOCUMENT_THRESHOLD = 8192  # Longer responses are sent as a .md file
+TYPING_INTERVAL = 4.0  # Typing indicator lasts ~5s on Telegram's side
+
+
+def _split_message(text: str, max_length: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Split text into chunks of at most max_length characters.
+
+    Prefers a newline, then a space, in the back half of each window so
+    every cut advances by at least max_length // 2 and the whole split
+    stays linear. Overlong runs without whitespace are hard-cut.
+    """
+    chunks = []
+    start = 0
+    while len(text) - start > max_length:
+        end = start + max_length
+        floor = start + max_length // 2
+        cut = text.rfind("\n", floor, end + 1)
+        if cut == -1:
+            cut = text.rfind(" ", floor, end + 1)
+        if cut == -1:
+            chunks.append(text[start:end])
+            start = end
+        else:
+            chunks.append(text[start:cut])
+            start = cut + 1
+    if start < len(text):
+        chunks.append(text[start:])
+    return chunks
+
+
+# Commands whose handlers ignored unauthorized users without replying
+_SILENT_COMMANDS = frozenset({"status", "stop", "heartbeat"})
+
+
+def _answers_unauthorized(message: Message) -> bool:
+    """Whether the handler this message would reach replies "Unauthorized."."""
+    if message.photo or message.document:
+        return True
+    if message.text is None:
+        return False  # No handler matches stickers, voice, etc.
+    if message.text.startswith("/"):
+        command = message.text.split(maxsplit=1)[0][1:].partition("@")[0]
+        return command not in _SILENT_COMMANDS
+    return True
+
+
+class _AuthMiddleware(BaseMiddleware):
+    """Reject messages from unauthorized users before handler dispatch.
+    
+    Only messages whose handler used to answer "Unauthorized." get that
+    reply; everything else is dropped silently.
+    """
+
+    def __init__(self, allowed_ids: frozenset[int]):
+        self.allowed_ids = allowed_ids
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: dict[str, Any],
+    ) -> Any:
+        user = event.from_user
+        if user is None or user.id not in self.allowed_ids:
+            logger.debug(f"Dropping message from unauthorized user {user.id if user else None}")
+            if _answers_unauthorized(event):
+                await event.answer("Unauthorized.")
+            return None
+        return await handler(event, data)
+
+
+class MessageCoalescer:
+    """Deliver a stream of messages in order without blocking the producer.
+
+    add() only queues; one sender task drains the queue, and messages that
+    pile up while a send is in flight go out joined as one message (up to
+    max_length), saving a round trip each. Send failures are logged, not
+    raised.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[Any]], max_length: int = MAX_MESSAGE_LENGTH):
+        self._send = send
+        self._max_length = max_length
+        self._pending: deque[str] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, text: str):
+        """Queue text for delivery."""
+        self._pending.append(text)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    def discard(self):
+        """Drop queued messages and abandon any send in flight."""
+        self._pending.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def flush(self):
+        """Wait until everything queued so far has been sent (or discarded)."""
+        if self._task is not None:
+            await asyncio.wait([self._task])
+
+    async def _drain(self):
+        while self._pending:
+            batch = [self._pending.popleft()]
+            size = len(batch[0])
+            while self._pending and size + 2 + len(self._pending[0]) <= self._max_length:
+                size += 2 + len(self._pending[0])
+                batch.append(self._pending.popleft())
+            try:
+                await self._send("\n\n".join(batch))
+            except Exception as e:
+                # Intermediate updates are best-effort; never fail the caller
+                logger.warning(f"Failed to send intermediate message: {e}")
+
 
 class TelegramBot:
     """Async Telegram bot with interruptible conversation processing."""
@@ -37,8 +155,12 @@ class TelegramBot:
             default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN),
         )
         self.dp = Dispatcher()
+        # Empty allow-list means everyone is authorized; skip the middleware hop
+        if self.settings.allowed_user_ids:
+            self.dp.message.outer_middleware(_AuthMiddleware(self.settings.allowed_user_ids))
         self._running = False
         self._typing_tasks: dict[int, asyncio.Task] = {}
+        self._last_typing: dict[int, float] = {}
         self._last_message_id: Optional[int] = None
         self._last_chat_id: Optional[int] = None
 
@@ -49,10 +171,6 @@ class TelegramBot:
 
         @self.dp.message(CommandStart())
         async def handle_start(message: Message):
-            if not self._is_authorized(message.from_user.id):
-                await message.answer("Unauthorized.")
-                return
-
             await message.answer(
                 "Hello! I'm Lethe, your autonomous assistant.\n\n"
                 "Send me any message and I'll help you.\n\n"
@@ -64,9 +182,6 @@ class TelegramBot:
 
         @self.dp.message(Command("status"))
         async def handle_status(message: Message):
-            if not self._is_authorized(message.from_user.id):
-                return
-
             chat_id = message.chat.id
             is_processing = self.conversation_manager.is_processing(chat_id) if self.conversation_manager else False
             is_debouncing = self.conversation_manager.is_debouncing(chat_id) if self.conversation_manager else False
@@ -129,9 +244,6 @@ class TelegramBot:
 
         @self.dp.message(Command("stop"))
         async def handle_stop(message: Message):
-            if not self._is_authorized(message.from_user.id):
-                return
-
             if self.conversation_manager:
                 cancelled = await self.conversation_manager.cancel(message.chat.id)
                 if cancelled:
@@ -141,9 +253,6 @@ class TelegramBot:
 
         @self.dp.message(Command("heartbeat"))
         async def handle_heartbeat(message: Message):
-            if not self._is_authorized(message.from_user.id):
-                return
-
             if self.heartbeat_callback:
                 await message.answer("Triggering heartbeat...")
                 await self.heartbeat_callback()
@@ -154,10 +263,6 @@ class TelegramBot:
 
         @self.dp.message(F.text)
         async def handle_message(message: Message):
-            if not self._is_authorized(message.from_user.id):
-                await message.answer("Unauthorized.")
-                return
-
             if not self.conversation_manager or not self.process_callback:
                 await message.answer("Bot not fully initialized.")
                 return
@@ -182,10 +287,6 @@ class TelegramBot:
         @self.dp.message(F.photo)
         async def handle_photo(message: Message):
             """Handle photo messages with optional caption."""
-            if not self._is_authorized(message.from_user.id):
-                await message.answer("Unauthorized.")
-                return
-
             if not self.conversation_manager or not self.process_callback:
                 await message.answer("Bot not fully initialized.")
                 return
@@ -239,10 +340,6 @@ class TelegramBot:
         @self.dp.message(F.document)
         async def handle_document(message: Message):
             """Handle document/file messages - save to workspace/Downloads."""
-            if not self._is_authorized(message.from_user.id):
-                await message.answer("Unauthorized.")
-                return
-
             if not self.conversation_manager or not self.process_callback:
                 await message.answer("Bot not fully initialized.")
                 return
@@ -291,11 +388,6 @@ class TelegramBot:
                 logger.error(f"Failed to process document: {e}")
                 await message.answer(f"Failed to download file: {e}")
 
-    def _is_authorized(self, user_id: int) -> bool:
-        """Check if user is authorized."""
-        allowed = self.settings.allowed_user_ids
-        return not allowed or user_id in allowed
-
     async def send_message(self, chat_id: int, text: str, parse_mode: str = "Markdown"):
         """Send a message, splitting on --- for natural pauses."""
         # Skip empty messages (some models return empty responses)
@@ -303,36 +395,37 @@ class TelegramBot:
             logger.warning("Skipping empty message to Telegram")
             return
             
-        MAX_LENGTH = 4000  # Telegram limit is 4096
-        
+        # Very long output is one upload instead of many sequential chunks
+        if len(text) > DOCUMENT_THRESHOLD:
+            from aiogram.types import BufferedInputFile
+            try:
+                document = BufferedInputFile(text.encode("utf-8"), filename="response.md")
+                await self.bot.send_document(chat_id, document)
+                self._last_typing.pop(chat_id, None)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to send response as document, chunking instead: {e}")
+
         # Split on --- for natural message breaks (human-like texting)
         # Each segment becomes a separate message with a pause
         segments = [s.strip() for s in text.split("---") if s.strip()]
         
         for i, segment in enumerate(segments):
             # Further split if segment is too long
-            if len(segment) <= MAX_LENGTH:
-                chunks = [segment]
-            else:
-                chunks = []
-                current = ""
-                for line in segment.split("\n"):
-                    if len(current) + len(line) + 1 > MAX_LENGTH:
-                        if current:
-                            chunks.append(current)
-                        current = line
-                    else:
-                        current = f"{current}\n{line}" if current else line
-                if current:
-                    chunks.append(current)
+            chunks = _split_message(segment)
             
-            for chunk in chunks:
+            for j, chunk in enumerate(chunks):
+                # Chunks must arrive in order, so they are sent sequentially;
+                # only pause between chunks, not after the last one
+                if j:
+                    await asyncio.sleep(0.1)
                 try:
                     await self.bot.send_message(chat_id, chunk, parse_mode=parse_mode)
                 except Exception:
                     # Fallback to no parsing if markdown fails
                     await self.bot.send_message(chat_id, chunk, parse_mode=None)
-                await asyncio.sleep(0.1)
+                # A sent message clears the typing indicator client-side
+                self._last_typing.pop(chat_id, None)
             
             # Pause between segments (natural typing feel)
             if i < len(segments) - 1:
@@ -373,11 +466,21 @@ class TelegramBot:
         if chat_id in self._typing_tasks:
             return
 
+        loop = asyncio.get_running_loop()
+
         async def typing_loop():
+            # Telegram shows "typing" for ~5s; don't resend if the previous
+            # indicator (e.g. from a stop/start between replies) is still live
+            last = self._last_typing.get(chat_id)
+            if last is not None:
+                remaining = TYPING_INTERVAL - (loop.time() - last)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
             while True:
                 try:
                     await self.bot.send_chat_action(chat_id, ChatAction.TYPING)
-                    await asyncio.sleep(4)
+                    self._last_typing[chat_id] = loop.time()
+                    await asyncio.sleep(TYPING_INTERVAL)
                 except asyncio.CancelledError:
                     break
                 except Exception:
@@ -409,6 +512,7 @@ class TelegramBot:
         for task in self._typing_tasks.values():
             task.cancel()
         self._typing_tasks.clear()
+        self._last_typing.clear()
         await self.dp.stop_polling()
         await self.bot.session.close()
         logger.info("Telegram bot stopped")
@@ -12,10 +12,13 @@ Workflow:
 """
 
 import asyncio
+import base64
 import json
 import logging
 import os
 import shutil
+from functools import cache
+from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -25,8 +28,9 @@ WORKSPACE = os.environ.get("WORKSPACE", os.path.expanduser("~/devel/lethe/worksp
 PROFILE_DIR = os.path.join(WORKSPACE, "browser")
 
 
+@cache
 def _get_agent_browser_path() -> str:
-    """Get the path to agent-browser CLI."""
+    """Get the path to agent-browser CLI (PATH is scanned once, on success)."""
     path = shutil.which("agent-browser")
     if not path:
         raise RuntimeError("agent-browser not found. Install with: npm install -g agent-browser")
@@ -76,13 +80,13 @@ async def browser_open_async(url: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or "Failed to open URL",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "url": url,
         "message": stdout.strip() if stdout else f"Navigated to {url}",
-    }, indent=2)
+    })
 
 
 async def browser_snapshot_async(interactive_only: bool = True, compact: bool = True) -> str:
@@ -116,12 +120,12 @@ async def browser_snapshot_async(interactive_only: bool = True, compact: bool =
         return json.dumps({
             "status": "error",
             "message": stderr or "Failed to get snapshot",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "snapshot": stdout.strip(),
-    }, indent=2)
+    })
 
 
 async def browser_click_async(ref_or_selector: str) -> str:
@@ -139,12 +143,12 @@ async def browser_click_async(ref_or_selector: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to click {ref_or_selector}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Clicked {ref_or_selector}",
-    }, indent=2)
+    })
 
 
 async def browser_fill_async(ref_or_selector: str, text: str) -> str:
@@ -163,12 +167,12 @@ async def browser_fill_async(ref_or_selector: str, text: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to fill {ref_or_selector}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Filled {ref_or_selector} with text",
-    }, indent=2)
+    })
 
 
 async def browser_type_async(ref_or_selector: str, text: str) -> str:
@@ -189,12 +193,12 @@ async def browser_type_async(ref_or_selector: str, text: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to type into {ref_or_selector}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Typed into {ref_or_selector}",
-    }, indent=2)
+    })
 
 
 async def browser_press_async(key: str) -> str:
@@ -212,12 +216,12 @@ async def browser_press_async(key: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to press {key}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Pressed {key}",
-    }, indent=2)
+    })
 
 
 async def browser_scroll_async(direction: str = "down", pixels: int = 500) -> str:
@@ -236,12 +240,18 @@ async def browser_scroll_async(direction: str = "down", pixels: int = 500) -> st
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to scroll {direction}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Scrolled {direction} {pixels}px",
-    }, indent=2)
+    })
+
+
+def _read_base64(path: str) -> tuple[int, str]:
+    """Read a file and return (size in bytes, base64 text)."""
+    data = Path(path).read_bytes()
+    return len(data), base64.b64encode(data).decode()
 
 
 async def browser_screenshot_async(save_path: str = "", full_page: bool = False) -> str:
@@ -254,8 +264,6 @@ async def browser_screenshot_async(save_path: str = "", full_page: bool = False)
     Returns:
         JSON with screenshot info. Image is also injected into conversation for you to see.
     """
-    import base64
-    
     args = ["screenshot"]
     if full_page:
         args.append("--full")
@@ -268,28 +276,27 @@ async def browser_screenshot_async(save_path: str = "", full_page: bool = False)
             return json.dumps({
                 "status": "error",
                 "message": stderr or stdout or "Failed to take screenshot",
-            }, indent=2)
+            })
         
-        # Read the file and encode as base64 for multimodal
+        # Read the file and encode as base64 for multimodal, off the event loop
         try:
-            with open(save_path, "rb") as f:
-                b64 = base64.b64encode(f.read()).decode()
+            size, b64 = await asyncio.to_thread(_read_base64, save_path)
             
             return json.dumps({
                 "status": "OK",
                 "saved_to": save_path,
-                "size": len(b64) * 3 // 4,  # Approximate decoded size
+                "size": size,
                 "_image_attachment": {
                     "base64_data": b64,
                     "media_type": "image/png",
                 },
-            }, indent=2)
+            })
         except Exception as e:
             return json.dumps({
                 "status": "OK",
                 "saved_to": save_path,
                 "note": f"Saved but could not read for display: {e}",
-            }, indent=2)
+            })
     else:
         # No path - screenshot goes to stdout as base64
         stdout, stderr, code = await _run_command(args)
@@ -298,7 +305,7 @@ async def browser_screenshot_async(save_path: str = "", full_page: bool = False)
             return json.dumps({
                 "status": "error",
                 "message": stderr or "Failed to take screenshot",
-            }, indent=2)
+            })
         
         b64 = stdout.strip()
         
@@ -309,7 +316,7 @@ async def browser_screenshot_async(save_path: str = "", full_page: bool = False)
                 "base64_data": b64,
                 "media_type": "image/png",
             },
-        }, indent=2)
+        })
 
 
 async def browser_get_text_async(ref_or_selector: str = "") -> str:
@@ -331,12 +338,12 @@ async def browser_get_text_async(ref_or_selector: str = "") -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or "Failed to get text",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "text": stdout.strip(),
-    }, indent=2)
+    })
 
 
 async def browser_get_url_async() -> str:
@@ -351,12 +358,12 @@ async def browser_get_url_async() -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or "Failed to get URL",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "url": stdout.strip(),
-    }, indent=2)
+    })
 
 
 async def browser_wait_async(
@@ -387,12 +394,12 @@ async def browser_wait_async(
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or "Wait failed or timed out",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": "Wait completed",
-    }, indent=2)
+    })
 
 
 async def browser_select_async(ref_or_selector: str, value: str) -> str:
@@ -411,12 +418,12 @@ async def browser_select_async(ref_or_selector: str, value: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to select {value}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Selected {value} in {ref_or_selector}",
-    }, indent=2)
+    })
 
 
 async def browser_hover_async(ref_or_selector: str) -> str:
@@ -434,12 +441,12 @@ async def browser_hover_async(ref_or_selector: str) -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or f"Failed to hover {ref_or_selector}",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": f"Hovering over {ref_or_selector}",
-    }, indent=2)
+    })
 
 
 async def browser_close_async() -> str:
@@ -454,12 +461,12 @@ async def browser_close_async() -> str:
         return json.dumps({
             "status": "error",
             "message": stderr or stdout or "Failed to close browser",
-        }, indent=2)
+        })
     
     return json.dumps({
         "status": "OK",
         "message": "Browser closed",
-    }, indent=2)
+    })
 
 
 # Sync wrappers for tools that need them
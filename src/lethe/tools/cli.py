@@ -5,10 +5,17 @@ Supports two modes:
 2. PTY: pseudo-terminal with screen emulation (for TUI apps like htop, vim, etc.)
 """
 
+import codecs
+import io
 import os
+import platform
+import selectors
+import shutil
 import subprocess
 import threading
+import time
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
 
 from lethe.tools.process_manager import (
@@ -27,6 +34,7 @@ DEFAULT_TIMEOUT = 120  # 2 minutes
 MAX_TIMEOUT = 600  # 10 minutes
 
 from lethe.tools.truncate import (
+    TailBuffer,
     truncate_tail,
     format_truncation_notice,
     format_size,
@@ -35,9 +43,20 @@ from lethe.tools.truncate import (
 )
 
 
-def _truncate_output(output: str) -> str:
-    """Truncate bash output from tail (keep end where errors/results are)."""
+def _truncate_output(output: str, dropped_lines: int = 0, dropped_bytes: int = 0) -> str:
+    """Truncate bash output from tail (keep end where errors/results are).
+    
+    dropped_lines/dropped_bytes account for output that was already
+    discarded before it reached us (see TailBuffer), so the notice still
+    reports line numbers for the whole output.
+    """
     result = truncate_tail(output)
+    if dropped_lines or dropped_bytes:
+        # Part of the output is gone already, so it is truncated regardless
+        result.total_lines += dropped_lines
+        result.total_bytes += dropped_bytes
+        result.truncated = True
+        result.truncated_by = result.truncated_by or "lines"
     if not result.truncated:
         return result.content
     
@@ -116,32 +135,93 @@ def bash(
         return _run_foreground(command, cwd, env, effective_timeout)
 
 
+def _collect_output(process: subprocess.Popen, timeout: int) -> tuple[TailBuffer, TailBuffer]:
+    """Stream a process's stdout/stderr into tail buffers until it exits.
+    
+    Only the part of each stream that truncation can show is kept, so a
+    command printing gigabytes costs no more memory than one printing 50KB.
+    Raises subprocess.TimeoutExpired (after killing the process) on timeout.
+    """
+    buffers = (TailBuffer(), TailBuffer())
+    sel = selectors.DefaultSelector()
+    for pipe, buffer in zip((process.stdout, process.stderr), buffers):
+        fd = pipe.fileno()
+        os.set_blocking(fd, False)
+        # Same universal-newline decoding as a text-mode pipe
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True
+        )
+        sel.register(fd, selectors.EVENT_READ, (buffer, decoder))
+    
+    deadline = time.monotonic() + timeout
+    try:
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in sel.select(timeout=remaining):
+                buffer, decoder = key.data
+                try:
+                    data = os.read(key.fd, 65536)
+                except BlockingIOError:
+                    continue
+                buffer.feed(decoder.decode(data, final=not data))
+                if not data:
+                    sel.unregister(key.fd)
+        process.wait(timeout=max(deadline - time.monotonic(), 0))
+    except subprocess.TimeoutExpired:
+        pass
+    finally:
+        sel.close()
+        process.stdout.close()
+        process.stderr.close()
+    
+    if process.returncode is None:
+        process.kill()
+        process.wait()
+        raise subprocess.TimeoutExpired(process.args, timeout)
+    return buffers
+
+
+def _format_output(stdout: TailBuffer, stderr: TailBuffer) -> str:
+    """Combine and truncate captured output.
+    
+    Same result as truncating f"{stdout}\\n--- stderr ---\\n{stderr}".strip()
+    built from the complete streams (or just the one that produced output).
+    """
+    if stdout.fed and stderr.fed:
+        out, out_lines, out_bytes = stdout.section(lstrip=True)
+        err, err_lines, err_bytes = stderr.section(rstrip=True)
+        output = f"{out}\n--- stderr ---\n{err}"
+        # An all-whitespace side strips into the separator too
+        if not out:
+            output = output.lstrip()
+        if not err:
+            output = output.rstrip()
+        dropped_lines, dropped_bytes = out_lines + err_lines, out_bytes + err_bytes
+    else:
+        stream = stdout if stdout.fed else stderr
+        output, dropped_lines, dropped_bytes = stream.section(lstrip=True, rstrip=True)
+    return _truncate_output(output, dropped_lines=dropped_lines, dropped_bytes=dropped_bytes)
+
+
 def _run_foreground(command: str, cwd: str, env: dict, timeout: int) -> str:
     """Run a command in the foreground and wait for completion."""
     try:
-        result = subprocess.run(
+        process = subprocess.Popen(
             command,
             shell=True,
             cwd=cwd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             env=env,
         )
+        stdout, stderr = _collect_output(process, timeout)
         
-        output_parts = []
-        if result.stdout:
-            output_parts.append(result.stdout)
-        if result.stderr:
-            if output_parts:
-                output_parts.append("\n--- stderr ---\n")
-            output_parts.append(result.stderr)
+        output = _format_output(stdout, stderr)
         
-        output = "".join(output_parts).strip()
-        output = _truncate_output(output)
-        
-        if result.returncode != 0:
-            return f"Exit code: {result.returncode}\n{output}"
+        if process.returncode != 0:
+            return f"Exit code: {process.returncode}\n{output}"
         
         return output if output else "(command completed with no output)"
         
@@ -151,6 +231,64 @@ def _run_foreground(command: str, cwd: str, env: dict, timeout: int) -> str:
         return f"Error executing command: {e}"
 
 
+def _pump_background(process: subprocess.Popen, bg_proc: BackgroundProcess, timeout: int):
+    """Read a background process's stdout/stderr into bg_proc until both close.
+    
+    Both pipes are multiplexed with a selector in 64KB reads, and process
+    exit and timeout are checked on the same loop.
+    """
+    sel = selectors.DefaultSelector()
+    for pipe, lines in ((process.stdout, bg_proc.stdout), (process.stderr, bg_proc.stderr)):
+        fd = pipe.fileno()
+        os.set_blocking(fd, False)
+        # Same universal-newline decoding as iterating a text-mode pipe
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True
+        )
+        # Fragments of the line still waiting for its newline, joined once
+        # it arrives so a long line is not re-copied on every read
+        sel.register(fd, selectors.EVENT_READ, (lines, decoder, []))
+    
+    deadline = time.monotonic() + timeout if timeout > 0 else None
+    try:
+        while sel.get_map():
+            for key, _ in sel.select(timeout=0.5):
+                lines, decoder, partial = key.data
+                try:
+                    data = os.read(key.fd, 65536)
+                except BlockingIOError:
+                    continue
+                *complete, tail = decoder.decode(data, final=not data).split("\n")
+                if complete:
+                    partial.append(complete[0])
+                    complete[0] = "".join(partial)
+                    partial.clear()
+                    lines.extend(complete)
+                if tail:
+                    partial.append(tail)
+                if not data:
+                    if partial:
+                        lines.append("".join(partial))
+                    sel.unregister(key.fd)
+            
+            if bg_proc.exit_code is None and process.poll() is not None:
+                bg_proc.exit_code = process.returncode
+                bg_proc.status = "completed" if process.returncode == 0 else "failed"
+            
+            if deadline is not None and bg_proc.status == "running" and time.monotonic() >= deadline:
+                process.kill()
+                bg_proc.status = "failed"
+                bg_proc.stderr.append(f"Command timed out after {timeout}s")
+                deadline = None
+    finally:
+        sel.close()
+    
+    exit_code = process.wait()
+    if bg_proc.exit_code is None:
+        bg_proc.exit_code = exit_code
+        bg_proc.status = "completed" if exit_code == 0 else "failed"
+
+
 def _run_background(command: str, cwd: str, env: dict, timeout: int) -> str:
     """Run a command in the background (regular subprocess mode)."""
     bash_id = get_next_bash_id()
@@ -162,7 +300,6 @@ def _run_background(command: str, cwd: str, env: dict, timeout: int) -> str:
             cwd=cwd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
             env=env,
         )
         
@@ -173,43 +310,11 @@ def _run_background(command: str, cwd: str, env: dict, timeout: int) -> str:
         )
         register_process(bash_id, bg_proc)
         
-        # Start threads to read output
-        def read_stdout():
-            if process.stdout:
-                for line in process.stdout:
-                    bg_proc.stdout.append(line.rstrip('\n'))
-        
-        def read_stderr():
-            if process.stderr:
-                for line in process.stderr:
-                    bg_proc.stderr.append(line.rstrip('\n'))
-        
-        def monitor_process():
-            """Monitor process and update status on completion."""
-            exit_code = process.wait()
-            bg_proc.exit_code = exit_code
-            bg_proc.status = "completed" if exit_code == 0 else "failed"
-        
-        # Start reader threads (daemon so they don't block shutdown)
-        stdout_thread = threading.Thread(target=read_stdout, daemon=True)
-        stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-        monitor_thread = threading.Thread(target=monitor_process, daemon=True)
-        
-        stdout_thread.start()
-        stderr_thread.start()
-        monitor_thread.start()
-        
-        # Set up timeout if specified
-        if timeout > 0:
-            def timeout_handler():
-                if bg_proc.status == "running":
-                    process.kill()
-                    bg_proc.status = "failed"
-                    bg_proc.stderr.append(f"Command timed out after {timeout}s")
-            
-            timer = threading.Timer(timeout, timeout_handler)
-            timer.daemon = True
-            timer.start()
+        # One thread reads both pipes and tracks exit/timeout
+        thread = threading.Thread(
+            target=_pump_background, args=(process, bg_proc, timeout), daemon=True
+        )
+        thread.start()
         
         return f"Command running in background with ID: {bash_id}"
         
@@ -250,28 +355,26 @@ def bash_output(shell_id: str, filter_pattern: str = "", last_lines: int = 0) ->
             f"Status: {proc.status}"
         )
     
-    # Combine stdout and stderr
-    stdout = "\n".join(proc.stdout)
-    stderr = "\n".join(proc.stderr)
-    
-    output = stdout
-    if stderr:
-        output = f"{output}\n{stderr}" if output else stderr
-    
-    # Apply filter if specified
+    # Snapshot the (bounded) line buffers; the reader thread keeps appending
+    stdout, stderr = list(proc.stdout), list(proc.stderr)
     if filter_pattern:
-        lines = output.split("\n")
-        lines = [line for line in lines if filter_pattern in line]
-        output = "\n".join(lines)
-    
-    # Apply last_lines limit
-    if last_lines > 0:
-        lines = output.split("\n")
-        if len(lines) > last_lines:
+        lines = [line for line in chain(stdout, stderr) if filter_pattern in line]
+        total = len(lines)
+        if last_lines > 0:
             lines = lines[-last_lines:]
-            output = f"... [{len(proc.stdout) + len(proc.stderr) - last_lines} earlier lines]\n" + "\n".join(lines)
-        else:
-            output = "\n".join(lines)
+    elif last_lines > 0:
+        # Only the tail is needed; slice it instead of copying every line
+        total = len(stdout) + len(stderr)
+        err_tail = stderr[-last_lines:]
+        need = last_lines - len(err_tail)
+        lines = (stdout[-need:] if need else []) + err_tail
+    else:
+        lines = stdout + stderr
+        total = len(lines)
+    
+    output = "\n".join(lines)
+    if last_lines > 0 and total > last_lines:
+        output = f"... [{total - last_lines} earlier lines]\n" + output
     
     output = _truncate_output(output)
     
@@ -398,14 +501,8 @@ def get_environment_info() -> str:
             "shell": os.environ.get("SHELL", "unknown"),
         }
         
-        result = subprocess.run(
-            "uname -a",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        info["os"] = result.stdout.strip() if result.returncode == 0 else "unknown"
+        u = platform.uname()
+        info["os"] = f"{u.system} {u.node} {u.release} {u.version} {u.machine}"
         
         lines = [f"{k}: {v}" for k, v in info.items()]
         return "Environment Information:\n" + "\n".join(lines)
@@ -425,16 +522,9 @@ def check_command_exists(command_name: str) -> str:
         Whether the command exists and its path
     """
     try:
-        result = subprocess.run(
-            f"which {command_name}",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        
-        if result.returncode == 0:
-            return f"'{command_name}' is available at: {result.stdout.strip()}"
+        path = shutil.which(command_name)
+        if path:
+            return f"'{command_name}' is available at: {path}"
         else:
             return f"'{command_name}' is not found in PATH"
             
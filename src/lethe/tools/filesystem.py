@@ -1,15 +1,47 @@
 """Filesystem tools for the agent."""
 
+import heapq
 import os
+import re
+import secrets
+import stat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Optional
+
 from lethe.tools.truncate import (
     truncate_head,
     format_truncation_notice,
     format_size,
     DEFAULT_MAX_LINES,
     DEFAULT_MAX_BYTES,
+    GREP_MAX_LINE_LENGTH,
+    GREP_TRUNCATION_SUFFIX,
 )
 
 
+# Characters with special meaning in a regex; patterns without any are plain literals
+_REGEX_SPECIAL = frozenset(".^$*+?{}[]\\|()")
+
+_NON_SPACE = re.compile(r"\S")
+
+GREP_MAX_MATCHES = 200
+
+# Files read concurrently ahead of the (in-order) grep scan
+GREP_READ_AHEAD = 8
+
+# File types grep_search skips without opening (always binary)
+GREP_BINARY_SUFFIXES = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".pdf",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".tar", ".7z",
+    ".pyc", ".so", ".o", ".a", ".dylib", ".dll", ".exe", ".wasm",
+})
+
+# Largest single os.write issued by _write_atomic
+WRITE_CHUNK_BYTES = 1 << 20
+
+
 def _is_tool(func):
     """Decorator to mark a function as a Letta tool."""
     func._is_tool = True
@@ -32,6 +64,43 @@ def _is_broad_recursive_target(path):
     return p == Path("/") or p == home
 
 
+def _skip_lines(text: str, count: int, pos: int = 0) -> int:
+    """Return the index just past `count` more newlines after pos (or len(text))."""
+    for _ in range(count):
+        nl = text.find("\n", pos)
+        if nl == -1:
+            return len(text)
+        pos = nl + 1
+    return pos
+
+
+def _write_atomic(path, data: bytes):
+    """Write data to path via a temp file in the same directory and rename.
+
+    Readers never see a partially written file. An existing file keeps its
+    permission bits; a new one gets the usual umask-filtered 0o666.
+    """
+    tmp_path = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        try:
+            os.fchmod(fd, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view[:WRITE_CHUNK_BYTES])
+            view = view[written:]
+        os.close(fd)
+        fd = None
+        os.replace(tmp_path, path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 @_is_tool
 def read_file(file_path: str, offset: int = 0, limit: int = 0) -> str:
     """Read a file from the filesystem.
@@ -57,9 +126,10 @@ def read_file(file_path: str, offset: int = 0, limit: int = 0) -> str:
             return f"Error: Not a file: {file_path}"
 
         with open(path, "r", encoding="utf-8", errors="replace") as f:
-            all_lines = f.readlines()
+            text = f.read()
 
-        total_lines = len(all_lines)
+        # Same count as readlines(): a final line without "\n" still counts
+        total_lines = text.count("\n") + (1 if text and not text.endswith("\n") else 0)
         
         # Convert 1-indexed offset to 0-indexed
         start_idx = max(0, offset - 1) if offset > 0 else 0
@@ -67,23 +137,25 @@ def read_file(file_path: str, offset: int = 0, limit: int = 0) -> str:
         if start_idx >= total_lines:
             return f"Error: Offset {offset} is beyond end of file ({total_lines} lines total)"
         
+        # Locate the selection by index instead of building a list of every line.
         # Apply user limit if specified, otherwise let truncation handle it
-        if limit > 0:
-            selected = all_lines[start_idx:start_idx + limit]
-        else:
-            selected = all_lines[start_idx:]
+        start = _skip_lines(text, start_idx)
+        end = _skip_lines(text, limit, start) if limit > 0 else len(text)
         
-        # Join and apply truncation
-        content = ''.join(selected)
-        result = truncate_head(content)
+        # truncate_head can't show more than DEFAULT_MAX_LINES lines, so only
+        # hand it one line past that and fill in the real totals afterwards
+        window_end = min(end, _skip_lines(text, DEFAULT_MAX_LINES + 1, start))
+        result = truncate_head(text[start:window_end])
+        if window_end < end:
+            result.total_lines = text.count("\n", start, end) + 1
+            if result.first_line_exceeds_limit:
+                result.total_bytes = len(text[start:end].encode("utf-8"))
         
         # Build output with line numbers
-        output_lines = result.content.split('\n')
-        numbered_lines = []
-        for i, line in enumerate(output_lines, start=start_idx + 1):
-            numbered_lines.append(f"{i:6d}\t{line.rstrip()}")
-        
-        output = '\n'.join(numbered_lines)
+        output = '\n'.join([
+            f"{i:6d}\t{line.rstrip()}"
+            for i, line in enumerate(result.content.split('\n'), start=start_idx + 1)
+        ])
         
         # Add truncation notice if needed
         if result.truncated:
@@ -118,8 +190,7 @@ def write_file(file_path: str, content: str) -> str:
         path = Path(file_path).expanduser().resolve()
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+        _write_atomic(path, content.encode("utf-8"))
 
         return f"Successfully wrote {len(content)} characters to {path}"
 
@@ -150,16 +221,18 @@ def edit_file(file_path: str, old_string: str, new_string: str, replace_all: boo
         with open(path, "r", encoding="utf-8") as f:
             content = f.read()
 
-        if old_string not in content:
+        start = content.find(old_string)
+        if start < 0:
             return f"Error: String not found in file: {repr(old_string[:100])}"
+        end = start + len(old_string)
 
         if replace_all:
-            new_content = content.replace(old_string, new_string)
             count = content.count(old_string)
+            new_content = content.replace(old_string, new_string)
         else:
-            if content.count(old_string) > 1:
+            if content.find(old_string, end) >= 0:
                 return f"Error: String appears multiple times ({content.count(old_string)}). Use replace_all=True or provide more context."
-            new_content = content.replace(old_string, new_string, 1)
+            new_content = content[:start] + new_string + content[end:]
             count = 1
 
         with open(path, "w", encoding="utf-8") as f:
@@ -196,15 +269,19 @@ def list_directory(path: str = ".", show_hidden: bool = False) -> str:
         if not dir_path.is_dir():
             return f"Error: Not a directory: {raw_path}"
 
+        # scandir's DirEntry caches the file type, so only files need a stat call
+        with os.scandir(dir_path) as it:
+            dir_entries = sorted(it, key=lambda e: e.name)
+
         entries = []
-        for entry in sorted(dir_path.iterdir()):
+        for entry in dir_entries:
             if not show_hidden and entry.name.startswith("."):
                 continue
 
             if entry.is_dir():
                 entries.append(f"[DIR]  {entry.name}/")
             elif entry.is_symlink():
-                entries.append(f"[LINK] {entry.name} -> {entry.resolve()}")
+                entries.append(f"[LINK] {entry.name} -> {Path(entry.path).resolve()}")
             else:
                 size = entry.stat().st_size
                 if size < 1024:
@@ -241,15 +318,18 @@ def glob_search(pattern: str, path: str = ".") -> str:
         base_path = Path(raw_path).expanduser().resolve()
         if _is_broad_recursive_target(base_path):
             return "Error: Refusing broad recursive search in root/home. Set a narrower path (prefer WORKSPACE_DIR)."
-        matches = list(base_path.glob(pattern))
-
-        matches.sort(key=lambda p: p.stat().st_mtime if p.exists() else 0, reverse=True)
+        # One stat per match; entries that vanished mid-search sort last
+        stamped = []
+        for match in base_path.glob(pattern):
+            try:
+                mtime = os.stat(match).st_mtime
+            except OSError:
+                mtime = 0
+            stamped.append((mtime, match))
 
-        if len(matches) > 100:
-            matches = matches[:100]
-            truncated = True
-        else:
-            truncated = False
+        truncated = len(stamped) > 100
+        newest = heapq.nlargest(100, stamped, key=itemgetter(0))
+        matches = [match for _, match in newest]
 
         result = [str(m.relative_to(base_path) if m.is_relative_to(base_path) else m) for m in matches]
 
@@ -263,6 +343,117 @@ def glob_search(pattern: str, path: str = ".") -> str:
         return f"Error in glob search: {e}"
 
 
+def _walk_files(root: str, file_pattern: str):
+    """Yield paths of files under root whose names match file_pattern.
+    
+    One os.scandir pass per directory (rglob scans each twice), top-down in
+    the same order as rglob. Hidden files are skipped (grep_search never
+    searched them); symlinked directories are not followed, as with rglob.
+    """
+    import fnmatch
+    match = re.compile(fnmatch.translate(file_pattern)).match
+    
+    def walk(directory):
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif not entry.name.startswith(".") and match(entry.name) and entry.is_file():
+                    yield entry.path
+            except OSError:
+                continue
+        for subdir in subdirs:
+            yield from walk(subdir)
+    
+    return walk(root)
+
+
+def _read_search_text(path) -> Optional[str]:
+    """Read a file for grep_search; None for binary or unreadable files."""
+    if os.path.splitext(path)[1].lower() in GREP_BINARY_SUFFIXES:
+        return None
+    try:
+        with open(path, "rb") as f:
+            # Probe the head first so binary blobs are never read in full
+            data = f.read(8192)
+            if b"\0" in data:
+                return None  # binary file
+            data += f.read()
+    except Exception:
+        return None
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        # Same universal newlines as text-mode line iteration
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _iter_line_matches(text: str, regex, literal: Optional[str]):
+    """Yield (line number, start, end) for each line of text that matches.
+    
+    The whole text is searched so the scanning happens in C; each regex
+    candidate is then confirmed against its own line (without the newline,
+    like grep) so matches spanning lines don't count. Plain literals can't
+    span lines and are found with str.find.
+    """
+    pos = 0
+    line_num = 1
+    counted = 0
+    while pos < len(text):
+        if literal is not None:
+            hit = text.find(literal, pos)
+        else:
+            m = regex.search(text, pos)
+            hit = m.start() if m else -1
+        if hit == -1 or (hit == len(text) and text.endswith("\n")):
+            return  # no match, or only at the empty end past the last line
+        start = text.rfind("\n", 0, hit) + 1
+        end = text.find("\n", hit)
+        end = len(text) if end == -1 else end
+        line_num += text.count("\n", counted, start)
+        counted = start
+        pos = end + 1
+
+        if literal is None and not regex.search(text[start:end]):
+            continue
+        yield line_num, start, end
+
+
+def _line_excerpt(text: str, start: int, end: int) -> tuple[str, bool]:
+    """truncate_line(text[start:end].rstrip()) without copying the whole line.
+    
+    Minified files can have megabyte-long lines; only the part that is
+    shown gets sliced out.
+    """
+    cut = start + GREP_MAX_LINE_LENGTH
+    if end <= cut or not _NON_SPACE.search(text, cut, end):
+        return text[start:min(end, cut)].rstrip(), False
+    return text[start:cut] + GREP_TRUNCATION_SUFFIX, True
+
+
+def _read_ahead(pool, fn, items, window: int):
+    """Yield (item, fn(item)) in order while up to `window` calls run ahead in `pool`."""
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, pool.submit(fn, item)))
+            if len(pending) >= window:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
 @_is_tool
 def grep_search(pattern: str, path: str = ".", file_pattern: str = "*") -> str:
     """Search for a regex pattern in files.
@@ -277,9 +468,7 @@ def grep_search(pattern: str, path: str = ".", file_pattern: str = "*") -> str:
     Returns:
         Matching lines with file and line numbers
     """
-    import re
     from pathlib import Path
-    from lethe.tools.truncate import truncate_line
     
     try:
         raw_path = path
@@ -288,43 +477,45 @@ def grep_search(pattern: str, path: str = ".", file_pattern: str = "*") -> str:
         base_path = Path(raw_path).expanduser().resolve()
         if _is_broad_recursive_target(base_path):
             return "Error: Refusing broad recursive search in root/home. Set a narrower path (prefer WORKSPACE_DIR)."
-        regex = re.compile(pattern)
+        regex = re.compile(pattern, re.MULTILINE)
+        literal = pattern if pattern and _REGEX_SPECIAL.isdisjoint(pattern) else None
 
         results = []
         files_searched = 0
         matches_found = 0
         lines_truncated = 0
 
-        for file_path in base_path.rglob(file_pattern):
-            if not file_path.is_file():
-                continue
-            if file_path.name.startswith("."):
-                continue
-
-            files_searched += 1
-
-            try:
-                with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                    for line_num, line in enumerate(f, 1):
-                        if regex.search(line):
-                            rel_path = file_path.relative_to(base_path) if file_path.is_relative_to(base_path) else file_path
-                            # Truncate long lines
-                            truncated_line, was_truncated = truncate_line(line.rstrip())
-                            if was_truncated:
-                                lines_truncated += 1
-                            results.append(f"{rel_path}:{line_num}: {truncated_line}")
-                            matches_found += 1
-
-                            if matches_found >= 200:
-                                break
-            except Exception:
-                continue
-
-            if matches_found >= 200:
-                break
+        if "/" in file_pattern or os.sep in file_pattern:
+            # Path-style patterns need pathlib's full glob matching
+            candidates = (
+                p for p in base_path.rglob(file_pattern)
+                if p.is_file() and not p.name.startswith(".")
+            )
+        else:
+            candidates = map(Path, _walk_files(str(base_path), file_pattern))
+        with ThreadPoolExecutor(max_workers=GREP_READ_AHEAD) as pool:
+            for file_path, text in _read_ahead(pool, _read_search_text, candidates, GREP_READ_AHEAD):
+                files_searched += 1
+                if text is None:
+                    continue
+
+                rel_path = file_path.relative_to(base_path) if file_path.is_relative_to(base_path) else file_path
+                prefix = f"{rel_path}:"
+                for line_num, start, end in _iter_line_matches(text, regex, literal):
+                    # Truncate long lines
+                    truncated_line, was_truncated = _line_excerpt(text, start, end)
+                    if was_truncated:
+                        lines_truncated += 1
+                    results.append(f"{prefix}{line_num}: {truncated_line}")
+                    matches_found += 1
+                    if matches_found >= GREP_MAX_MATCHES:
+                        break
+
+                if matches_found >= GREP_MAX_MATCHES:
+                    break
 
         header = f"Found {matches_found} matches in {files_searched} files"
-        if matches_found >= 200:
+        if matches_found >= GREP_MAX_MATCHES:
             header += " (limit reached)"
         if lines_truncated > 0:
             header += f" ({lines_truncated} lines truncated to 500 chars)"
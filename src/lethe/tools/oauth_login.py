@@ -48,19 +48,21 @@ def _generate_pkce() -> tuple:
     return verifier, challenge
 
 
+# Query parameters that are the same for every login, encoded once
+_STATIC_AUTHORIZE_PARAMS = urlencode({
+    "code": "true",
+    "client_id": CLIENT_ID,
+    "response_type": "code",
+    "redirect_uri": REDIRECT_URI,
+    "scope": SCOPES,
+    "code_challenge_method": "S256",
+})
+
+
 def _build_authorize_url(verifier: str, challenge: str) -> str:
     """Build the OAuth authorization URL."""
-    params = {
-        "code": "true",
-        "client_id": CLIENT_ID,
-        "response_type": "code",
-        "redirect_uri": REDIRECT_URI,
-        "scope": SCOPES,
-        "code_challenge": challenge,
-        "code_challenge_method": "S256",
-        "state": verifier,
-    }
-    return f"{AUTHORIZE_URL}?{urlencode(params)}"
+    # verifier and challenge are URL-safe base64, so they need no quoting
+    return f"{AUTHORIZE_URL}?{_STATIC_AUTHORIZE_PARAMS}&code_challenge={challenge}&state={verifier}"
 
 
 async def _exchange_code(code: str, verifier: str) -> dict:
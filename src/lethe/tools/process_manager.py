@@ -7,23 +7,37 @@ Supports two modes:
 
 import os
 import pty
+import queue
 import select
 import subprocess
 import threading
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
 import pyte
 
+# Retention cap per stream; older lines are dropped as new ones arrive
+MAX_OUTPUT_LINES = 4000
+# Retention cap for raw PTY output, in bytes (reads can be up to 64KB each)
+MAX_RAW_OUTPUT_BYTES = 256 * 1024
+# PTY reads that may wait for the screen feeder; a full queue blocks the
+# reader, so a child that outpaces pyte is throttled by the PTY buffer
+PTY_QUEUE_CHUNKS = 16
+
 
 @dataclass
 class BackgroundProcess:
-    """Tracks a background shell process."""
+    """Tracks a background shell process.
+    
+    stdout/stderr keep only the last MAX_OUTPUT_LINES lines each, and
+    raw_output the last MAX_RAW_OUTPUT_BYTES bytes read from the PTY.
+    """
     process: Optional[subprocess.Popen]  # For regular mode
     command: str
-    stdout: list[str] = field(default_factory=list)
-    stderr: list[str] = field(default_factory=list)
+    stdout: deque[str] = field(default_factory=lambda: deque(maxlen=MAX_OUTPUT_LINES))
+    stderr: deque[str] = field(default_factory=lambda: deque(maxlen=MAX_OUTPUT_LINES))
     status: str = "running"  # running, completed, failed
     exit_code: Optional[int] = None
     start_time: Optional[datetime] = None
@@ -34,26 +48,41 @@ class BackgroundProcess:
     pty_pid: Optional[int] = None  # Child PID
     screen: Optional[pyte.Screen] = None  # Terminal emulator screen
     stream: Optional[pyte.Stream] = None  # Connects pty output to screen
-    raw_output: list[bytes] = field(default_factory=list)  # Raw PTY output buffer
+    raw_output: bytearray = field(default_factory=bytearray)  # Raw PTY output buffer
+    _screen_text: Optional[str] = field(default=None, repr=False)  # Last render of screen
+    
+    def append_raw_output(self, data: bytes) -> None:
+        """Append PTY output, dropping the oldest bytes past the cap."""
+        self.raw_output += data
+        excess = len(self.raw_output) - MAX_RAW_OUTPUT_BYTES
+        if excess > 0:
+            del self.raw_output[:excess]
     
     def get_screen_text(self) -> str:
         """Get the current terminal screen as text."""
         if not self.screen:
             return ""
         
-        lines = []
-        for y in range(self.screen.lines):
-            line = ""
-            for x in range(self.screen.columns):
-                char = self.screen.buffer[y][x]
-                line += char.data if char.data else " "
-            lines.append(line.rstrip())
+        # pyte marks every line it touches as dirty, so an unchanged screen
+        # can reuse the last render. Clear before rendering so output that
+        # arrives mid-render marks the screen dirty again.
+        if self._screen_text is not None and not self.screen.dirty:
+            return self._screen_text
+        self.screen.dirty.clear()
+        
+        columns = range(self.screen.columns)
+        buffer = self.screen.buffer
+        lines = [
+            "".join(buffer[y][x].data or " " for x in columns).rstrip()
+            for y in range(self.screen.lines)
+        ]
         
         # Remove trailing empty lines
         while lines and not lines[-1]:
             lines.pop()
         
-        return "\n".join(lines)
+        self._screen_text = "\n".join(lines)
+        return self._screen_text
     
     def get_cursor_position(self) -> tuple[int, int]:
         """Get the current cursor position (row, col)."""
@@ -80,8 +109,13 @@ class BackgroundProcess:
             os.write(self.pty_fd, data.encode())
 
 
-# Global registry of background processes
+# Global registry of background processes. Tool calls from different
+# threads add, remove and list entries, so every access holds
+# _registry_lock. Per-process fields such as status and exit_code are
+# written only by that process's reader thread and are read without the
+# lock (single attribute writes).
 background_processes: dict[str, BackgroundProcess] = {}
+_registry_lock = threading.Lock()
 
 # Counter for generating unique bash IDs
 _bash_id_counter = 0
@@ -90,38 +124,42 @@ _bash_id_counter = 0
 def get_next_bash_id() -> str:
     """Get the next unique bash ID."""
     global _bash_id_counter
-    _bash_id_counter += 1
-    return f"bash_{_bash_id_counter}"
+    with _registry_lock:
+        _bash_id_counter += 1
+        return f"bash_{_bash_id_counter}"
 
 
 def get_process(shell_id: str) -> Optional[BackgroundProcess]:
     """Get a background process by ID."""
-    return background_processes.get(shell_id)
+    with _registry_lock:
+        return background_processes.get(shell_id)
 
 
 def register_process(shell_id: str, proc: BackgroundProcess):
     """Register a new background process."""
-    background_processes[shell_id] = proc
+    with _registry_lock:
+        background_processes[shell_id] = proc
 
 
 def remove_process(shell_id: str) -> bool:
     """Remove a background process from tracking."""
-    if shell_id in background_processes:
-        proc = background_processes[shell_id]
-        # Clean up PTY resources
-        if proc.pty_fd:
-            try:
-                os.close(proc.pty_fd)
-            except OSError:
-                pass
-        del background_processes[shell_id]
-        return True
-    return False
+    with _registry_lock:
+        proc = background_processes.pop(shell_id, None)
+    if proc is None:
+        return False
+    # Clean up PTY resources
+    if proc.pty_fd:
+        try:
+            os.close(proc.pty_fd)
+        except OSError:
+            pass
+    return True
 
 
 def list_processes() -> dict[str, BackgroundProcess]:
-    """List all tracked background processes."""
-    return background_processes.copy()
+    """List all tracked background processes (a snapshot; entries are shared)."""
+    with _registry_lock:
+        return background_processes.copy()
 
 
 def create_pty_process(
@@ -145,9 +183,10 @@ def create_pty_process(
     """
     bash_id = get_next_bash_id()
     
-    # Create pyte screen and stream
+    # Create pyte screen and stream (ByteStream decodes UTF-8 incrementally,
+    # so multi-byte characters split across reads stay intact)
     screen = pyte.Screen(cols, rows)
-    stream = pyte.Stream(screen)
+    stream = pyte.ByteStream(screen)
     
     # Fork with PTY
     pid, fd = pty.fork()
@@ -186,27 +225,64 @@ def create_pty_process(
         )
         register_process(bash_id, bg_proc)
         
-        # Start reader thread
+        # Raw PTY reads, handed from the reader to the feeder thread
+        # (None marks EOF)
+        chunks: queue.Queue[Optional[bytes]] = queue.Queue(maxsize=PTY_QUEUE_CHUNKS)
+        
+        def feed_screen():
+            """Feed PTY output to the terminal emulator, batching queued reads."""
+            while True:
+                data = chunks.get()
+                if data is None:
+                    return
+                batch = [data]
+                size = len(data)
+                while size < 65536:
+                    try:
+                        data = chunks.get_nowait()
+                    except queue.Empty:
+                        break
+                    if data is None:
+                        stream.feed(b"".join(batch))
+                        return
+                    batch.append(data)
+                    size += len(data)
+                stream.feed(b"".join(batch))
+        
+        # Start reader thread; pyte emulation is slow pure Python, so it
+        # runs on its own thread and the reader only waits on it once
+        # PTY_QUEUE_CHUNKS reads are backed up
         def read_pty():
-            """Read from PTY and feed to terminal emulator."""
-            while bg_proc.status == "running":
+            """Read from PTY and queue output for the feeder thread."""
+            eof = False
+            while not eof and bg_proc.status == "running":
                 try:
                     # Check if there's data to read
                     r, _, _ = select.select([fd], [], [], 0.1)
-                    if r:
-                        try:
-                            data = os.read(fd, 4096)
-                            if data:
-                                bg_proc.raw_output.append(data)
-                                # Feed to terminal emulator
-                                stream.feed(data.decode("utf-8", errors="replace"))
-                            else:
-                                # EOF - process exited
-                                break
-                        except OSError:
-                            break
                 except (ValueError, OSError):
                     break
+                if not r:
+                    continue
+                # Drain everything that is buffered before going back to
+                # select, so a chatty process costs one wakeup per burst
+                while True:
+                    try:
+                        data = os.read(fd, 65536)
+                    except BlockingIOError:
+                        break
+                    except OSError:
+                        eof = True
+                        break
+                    if not data:
+                        # EOF - process exited
+                        eof = True
+                        break
+                    bg_proc.append_raw_output(data)
+                    chunks.put(data)
+            
+            # Let the screen catch up before reporting the exit
+            chunks.put(None)
+            feeder_thread.join()
             
             # Process finished - get exit status
             try:
@@ -219,6 +295,8 @@ def create_pty_process(
             except ChildProcessError:
                 bg_proc.status = "completed"
         
+        feeder_thread = threading.Thread(target=feed_screen, daemon=True)
+        feeder_thread.start()
         reader_thread = threading.Thread(target=read_pty, daemon=True)
         reader_thread.start()
         
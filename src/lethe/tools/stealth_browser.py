@@ -26,6 +26,7 @@ import os
 import random
 import shutil
 import time
+from functools import cache
 from typing import Optional
 from pathlib import Path
 
@@ -112,8 +113,9 @@ STEALTH_ARGS = [
 ]
 
 
+@cache
 def _get_agent_browser_path() -> str:
-    """Get the path to agent-browser CLI."""
+    """Get the path to agent-browser CLI (PATH is scanned once, on success)."""
     path = shutil.which("agent-browser")
     if not path:
         raise RuntimeError("agent-browser not found. Install with: npm install -g agent-browser")
@@ -470,7 +472,7 @@ def stealth_open(url: str, profile_dir: Optional[str] = None) -> str:
     """Sync wrapper for stealth browser open."""
     browser = StealthBrowser(profile_dir=Path(profile_dir) if profile_dir else None)
     result = asyncio.get_event_loop().run_until_complete(browser.open(url))
-    return json.dumps(result, indent=2)
+    return json.dumps(result)
 
 
 def stealth_snapshot(interactive_only: bool = True, compact: bool = True) -> str:
@@ -479,21 +481,21 @@ def stealth_snapshot(interactive_only: bool = True, compact: bool = True) -> str
     result = asyncio.get_event_loop().run_until_complete(
         browser.snapshot(interactive_only, compact)
     )
-    return json.dumps(result, indent=2)
+    return json.dumps(result)
 
 
 def stealth_click(ref_or_selector: str) -> str:
     """Sync wrapper for stealth click."""
     browser = StealthBrowser()
     result = asyncio.get_event_loop().run_until_complete(browser.click(ref_or_selector))
-    return json.dumps(result, indent=2)
+    return json.dumps(result)
 
 
 def stealth_fill(ref_or_selector: str, text: str) -> str:
     """Sync wrapper for stealth fill."""
     browser = StealthBrowser()
     result = asyncio.get_event_loop().run_until_complete(browser.fill(ref_or_selector, text))
-    return json.dumps(result, indent=2)
+    return json.dumps(result)
 
 
 def stealth_screenshot(save_path: str = "", full_page: bool = False) -> str:
@@ -502,11 +504,11 @@ def stealth_screenshot(save_path: str = "", full_page: bool = False) -> str:
     result = asyncio.get_event_loop().run_until_complete(
         browser.screenshot(save_path, full_page)
     )
-    return json.dumps(result, indent=2)
+    return json.dumps(result)
 
 
 def stealth_mask_webdriver() -> str:
     """Sync wrapper for masking webdriver."""
     browser = StealthBrowser()
     result = asyncio.get_event_loop().run_until_complete(browser.mask_webdriver())
-    return json.dumps(result, indent=2)
+    return json.dumps(result)
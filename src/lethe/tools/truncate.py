@@ -10,14 +10,15 @@ Direction-aware:
 """
 
 from dataclasses import dataclass
-from typing import Optional, Literal
+from typing import Optional, Literal, Union
 
 DEFAULT_MAX_LINES = 2000
 DEFAULT_MAX_BYTES = 50 * 1024  # 50KB
 GREP_MAX_LINE_LENGTH = 500  # Max chars per grep match line
+GREP_TRUNCATION_SUFFIX = "... [truncated]"
 
 
-@dataclass
+@dataclass(slots=True)
 class TruncationResult:
     """Result of a truncation operation."""
     content: str
@@ -33,6 +34,17 @@ class TruncationResult:
     max_bytes: int = DEFAULT_MAX_BYTES
 
 
+def _measure_buffer(content: str) -> tuple[Union[str, bytes], Union[str, bytes]]:
+    """Return (buffer, newline) where offsets into buffer are UTF-8 byte offsets.
+    
+    ASCII text is its own UTF-8 encoding, so it is used as-is rather than
+    copied into bytes.
+    """
+    if content.isascii():
+        return content, "\n"
+    return content.encode('utf-8'), b"\n"
+
+
 def format_size(bytes_count: int) -> str:
     """Format bytes as human-readable size."""
     if bytes_count < 1024:
@@ -54,9 +66,9 @@ def truncate_head(
     Never returns partial lines. If first line exceeds byte limit,
     returns empty content with first_line_exceeds_limit=True.
     """
-    total_bytes = len(content.encode('utf-8'))
-    lines = content.split('\n')
-    total_lines = len(lines)
+    buf, nl = _measure_buffer(content)
+    total_bytes = len(buf)
+    total_lines = buf.count(nl) + 1
     
     # Check if no truncation needed
     if total_lines <= max_lines and total_bytes <= max_bytes:
@@ -73,7 +85,8 @@ def truncate_head(
         )
     
     # Check if first line alone exceeds byte limit
-    first_line_bytes = len(lines[0].encode('utf-8'))
+    first_line_end = buf.find(nl)
+    first_line_bytes = total_bytes if first_line_end == -1 else first_line_end
     if first_line_bytes > max_bytes:
         return TruncationResult(
             content="",
@@ -88,30 +101,34 @@ def truncate_head(
             max_bytes=max_bytes,
         )
     
-    # Collect complete lines that fit
-    output_lines_arr = []
-    output_bytes_count = 0
+    # Collect complete lines that fit, walking newlines in the buffer.
+    # buf[:cut] is the output so far.
+    cut = 0
+    output_lines = 0
     truncated_by: Literal["lines", "bytes"] = "lines"
     
-    for i, line in enumerate(lines):
-        if i >= max_lines:
-            break
-            
-        line_bytes = len(line.encode('utf-8')) + (1 if i > 0 else 0)  # +1 for newline
+    while output_lines < max_lines:
+        line_start = cut + 1 if output_lines else 0  # skip the joining newline
+        line_end = buf.find(nl, line_start)
+        if line_end == -1:
+            line_end = total_bytes
         
-        if output_bytes_count + line_bytes > max_bytes:
+        if line_end > max_bytes:
             truncated_by = "bytes"
             break
         
-        output_lines_arr.append(line)
-        output_bytes_count += line_bytes
+        cut = line_end
+        output_lines += 1
+        if cut == total_bytes:
+            break
     
     # If we exited due to line limit
-    if len(output_lines_arr) >= max_lines and output_bytes_count <= max_bytes:
+    if output_lines >= max_lines:
         truncated_by = "lines"
     
-    output_content = '\n'.join(output_lines_arr)
-    final_output_bytes = len(output_content.encode('utf-8'))
+    output_content = buf[:cut]
+    if isinstance(output_content, bytes):
+        output_content = output_content.decode('utf-8')
     
     return TruncationResult(
         content=output_content,
@@ -119,8 +136,8 @@ def truncate_head(
         truncated_by=truncated_by,
         total_lines=total_lines,
         total_bytes=total_bytes,
-        output_lines=len(output_lines_arr),
-        output_bytes=final_output_bytes,
+        output_lines=output_lines,
+        output_bytes=cut,
         max_lines=max_lines,
         max_bytes=max_bytes,
     )
@@ -136,9 +153,9 @@ def truncate_tail(
     Suitable for bash output where you want to see the end (errors, final results).
     May return partial first line if the last line of original content exceeds byte limit.
     """
-    total_bytes = len(content.encode('utf-8'))
-    lines = content.split('\n')
-    total_lines = len(lines)
+    buf, nl = _measure_buffer(content)
+    total_bytes = len(buf)
+    total_lines = buf.count(nl) + 1
     
     # Check if no truncation needed
     if total_lines <= max_lines and total_bytes <= max_bytes:
@@ -154,39 +171,41 @@ def truncate_tail(
             max_bytes=max_bytes,
         )
     
-    # Work backwards from the end
-    output_lines_arr = []
-    output_bytes_count = 0
+    # Work backwards from the end with rfind on the buffer, so only the
+    # kept tail is ever decoded. buf[cut:] is the output so far.
+    cut = total_bytes
+    output_lines = 0
     truncated_by: Literal["lines", "bytes"] = "lines"
     last_line_partial = False
     
-    for i in range(len(lines) - 1, -1, -1):
-        if len(output_lines_arr) >= max_lines:
-            break
-            
-        line = lines[i]
-        line_bytes = len(line.encode('utf-8')) + (1 if output_lines_arr else 0)  # +1 for newline
+    while output_lines < max_lines and cut > 0:
+        line_end = cut - 1 if output_lines else cut  # skip the joining newline
+        line_start = buf.rfind(nl, 0, line_end) + 1
         
-        if output_bytes_count + line_bytes > max_bytes:
+        if total_bytes - line_start > max_bytes:
             truncated_by = "bytes"
             # Edge case: if we haven't added ANY lines yet and this line exceeds max_bytes,
             # take the end of the line (partial)
-            if not output_lines_arr:
-                truncated_line = _truncate_string_from_end(line, max_bytes)
-                output_lines_arr.insert(0, truncated_line)
-                output_bytes_count = len(truncated_line.encode('utf-8'))
+            if not output_lines:
+                cut = total_bytes - max_bytes
+                # Skip incomplete UTF-8 sequences (continuation bytes are 10xxxxxx)
+                if isinstance(buf, bytes):
+                    while cut < total_bytes and (buf[cut] & 0xC0) == 0x80:
+                        cut += 1
+                output_lines = 1
                 last_line_partial = True
             break
         
-        output_lines_arr.insert(0, line)
-        output_bytes_count += line_bytes
+        cut = line_start
+        output_lines += 1
     
     # If we exited due to line limit
-    if len(output_lines_arr) >= max_lines and output_bytes_count <= max_bytes:
+    if output_lines >= max_lines and total_bytes - cut <= max_bytes:
         truncated_by = "lines"
     
-    output_content = '\n'.join(output_lines_arr)
-    final_output_bytes = len(output_content.encode('utf-8'))
+    output_content = buf[cut:]
+    if isinstance(output_content, bytes):
+        output_content = output_content.decode('utf-8')
     
     return TruncationResult(
         content=output_content,
@@ -194,33 +213,126 @@ def truncate_tail(
         truncated_by=truncated_by,
         total_lines=total_lines,
         total_bytes=total_bytes,
-        output_lines=len(output_lines_arr),
-        output_bytes=final_output_bytes,
+        output_lines=output_lines,
+        output_bytes=total_bytes - cut,
         last_line_partial=last_line_partial,
         max_lines=max_lines,
         max_bytes=max_bytes,
     )
 
 
-def _truncate_string_from_end(s: str, max_bytes: int) -> str:
-    """Truncate a string to fit within a byte limit (from the end).
+def _span(text: str) -> tuple[int, int, int]:
+    """(newlines, UTF-8 bytes, chars) in text."""
+    nbytes = len(text) if text.isascii() else len(text.encode('utf-8'))
+    return text.count('\n'), nbytes, len(text)
+
+
+def _add(a: tuple[int, int, int], b: tuple[int, int, int]) -> tuple[int, int, int]:
+    return a[0] + b[0], a[1] + b[1], a[2] + b[2]
+
+
+_NO_SPAN = (0, 0, 0)
+
+
+class TailBuffer:
+    """Keep just enough of the end of a text stream for truncate_tail.
     
-    Handles multi-byte UTF-8 characters correctly.
+    Text is fed incrementally (e.g. from a subprocess pipe) and only a
+    window at the end is retained: the last max_lines + 1 lines or the
+    last max_bytes + 1 characters, whichever is shorter, which is more
+    than truncate_tail ever looks at, so it still sees the overflow.
+    
+    Callers strip bash output, so the window is measured back from the
+    last non-whitespace character; a trailing whitespace run is kept
+    separately (its own tail window, the middle only counted) in case
+    more output follows it. section() returns the retained tail of the
+    optionally stripped stream plus the lines/bytes it no longer holds,
+    so totals can be reported for the whole stream. Memory stays
+    O(max_bytes) however much is fed.
     """
-    encoded = s.encode('utf-8')
-    if len(encoded) <= max_bytes:
-        return s
     
-    # Take the last max_bytes, but ensure we don't break a multi-byte character
-    truncated = encoded[-max_bytes:]
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.fed = False  # Anything at all was fed (even whitespace)
+        self._trim_at = 2 * (max_bytes + 1)
+        # The stream is: <prefix> head <gap> ws
+        self._head = ""  # Window ending at the last non-whitespace char
+        self._ws = ""  # Tail of the whitespace run after it
+        self._prefix = _NO_SPAN  # Dropped before head
+        self._gap = _NO_SPAN  # Dropped from the middle of the whitespace run
+        self._leading: Optional[tuple[int, int, int]] = None  # Leading whitespace, once known
     
-    # Skip incomplete UTF-8 sequences at the start
-    # UTF-8 continuation bytes start with 10xxxxxx (0x80-0xBF)
-    i = 0
-    while i < len(truncated) and (truncated[i] & 0xC0) == 0x80:
-        i += 1
+    def _window_start(self, text: str) -> int:
+        """Index from which text holds the window truncate_tail needs."""
+        start = len(text) - (self.max_bytes + 1)
+        nl = len(text)
+        for _ in range(self.max_lines + 1):
+            nl = text.rfind('\n', 0, nl)
+            if nl == -1:
+                break
+        else:
+            start = max(start, nl + 1)
+        return max(start, 0)
     
-    return truncated[i:].decode('utf-8', errors='replace')
+    def feed(self, text: str):
+        """Append text from the stream."""
+        if not text:
+            return
+        self.fed = True
+        end = len(text.rstrip())
+        if not end:
+            self._ws += text
+            if len(self._ws) > self._trim_at:
+                start = self._window_start(self._ws)
+                self._gap = _add(self._gap, _span(self._ws[:start]))
+                self._ws = self._ws[start:]
+            return
+        
+        if self._leading is None:
+            lead = text[:len(text) - len(text.lstrip())]
+            self._leading = _add(_add(self._gap, _span(self._ws)), _span(lead))
+        # The whitespace run is now interior; past a gap, its tail alone
+        # already covers the window, so the old head is no longer needed
+        if self._gap != _NO_SPAN:
+            self._prefix = _add(_add(self._prefix, _span(self._head)), self._gap)
+            self._head = self._ws
+            self._gap = _NO_SPAN
+        else:
+            self._head += self._ws
+        self._head += text[:end]
+        self._ws = text[end:]
+        
+        if len(self._head) > self._trim_at:
+            start = self._window_start(self._head)
+            self._prefix = _add(self._prefix, _span(self._head[:start]))
+            self._head = self._head[start:]
+    
+    def section(self, lstrip: bool = False, rstrip: bool = False) -> tuple[str, int, int]:
+        """Return (text, dropped_lines, dropped_bytes) for the stripped stream.
+        
+        text is the retained end of the stream (after str.lstrip/rstrip
+        of the whole stream, as requested); the dropped counts cover the
+        rest of the stripped stream.
+        """
+        if self._leading is None:
+            # Whitespace only: stripping either side removes everything
+            if lstrip or rstrip:
+                return "", 0, 0
+            return self._ws, self._gap[0], self._gap[1]
+        
+        if rstrip:
+            text, dropped = self._head, self._prefix
+        else:
+            text, dropped = self._head + self._ws, _add(self._prefix, self._gap)
+        if lstrip:
+            if self._prefix[2] < self._leading[2]:
+                # Everything dropped so far was leading whitespace
+                text = text.lstrip()
+                dropped = _add(dropped, tuple(-n for n in self._prefix))
+            else:
+                dropped = _add(dropped, tuple(-n for n in self._leading))
+        return text, dropped[0], dropped[1]
 
 
 def truncate_line(line: str, max_chars: int = GREP_MAX_LINE_LENGTH) -> tuple[str, bool]:
@@ -233,7 +345,7 @@ def truncate_line(line: str, max_chars: int = GREP_MAX_LINE_LENGTH) -> tuple[str
     """
     if len(line) <= max_chars:
         return line, False
-    return f"{line[:max_chars]}... [truncated]", True
+    return line[:max_chars] + GREP_TRUNCATION_SUFFIX, True
 
 
 def format_truncation_notice(
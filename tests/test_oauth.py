@@ -0,0 +1,109 @@
+"""Tests for Claude OAuth token refresh."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from lethe.oauth import ClaudeOAuth, OAuthTokens
+
+
+def make_oauth(tmp_path, expires_in: timedelta, status: int) -> tuple[ClaudeOAuth, list]:
+    """ClaudeOAuth with stored tokens and a token endpoint answering `status`."""
+    token_path = tmp_path / "tokens.json"
+    tokens = OAuthTokens("access-1", "refresh-1", datetime.now(timezone.utc) + expires_in)
+    token_path.write_text(json.dumps(tokens.to_dict()))
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if status == 200:
+            return httpx.Response(200, json={"access_token": "access-2", "expires_in": 3600})
+        return httpx.Response(status, text="nope")
+
+    oauth = ClaudeOAuth(token_path=token_path)
+    oauth._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return oauth, requests
+
+
+class TestTokenRefresh:
+    """Tests for blocking and background refresh."""
+
+    @pytest.mark.parametrize("status", [400, 429, 503])
+    async def test_failed_background_refresh_keeps_tokens(self, tmp_path, status):
+        """A proactive refresh failure must not destroy still-valid credentials."""
+        oauth, requests = make_oauth(tmp_path, timedelta(minutes=8), status)
+
+        assert await oauth.get_access_token() == "access-1"
+        await oauth._refresh_task
+
+        assert len(requests) == 1
+        assert oauth.has_valid_tokens()
+        assert oauth.token_path.exists()
+        # Retried later, not on every call
+        assert await oauth.get_access_token() == "access-1"
+        assert oauth._refresh_task is None
+        await oauth.close()
+
+    async def test_background_refresh_replaces_tokens(self, tmp_path):
+        oauth, _ = make_oauth(tmp_path, timedelta(minutes=8), 200)
+
+        assert await oauth.get_access_token() == "access-1"
+        await oauth._refresh_task
+
+        assert await oauth.get_access_token() == "access-2"
+        await oauth.close()
+
+    async def test_rejected_blocking_refresh_clears_tokens(self, tmp_path):
+        oauth, _ = make_oauth(tmp_path, timedelta(minutes=-1), 401)
+
+        with pytest.raises(ValueError):
+            await oauth.get_access_token()
+
+        assert not oauth.has_valid_tokens()
+        assert not oauth.token_path.exists()
+        await oauth.close()
+
+    async def test_transient_blocking_failure_keeps_tokens(self, tmp_path):
+        oauth, _ = make_oauth(tmp_path, timedelta(minutes=-1), 503)
+
+        with pytest.raises(ValueError):
+            await oauth.get_access_token()
+
+        assert oauth.has_valid_tokens()
+        assert oauth.token_path.exists()
+        await oauth.close()
+
+
+class TestEnsureAuth:
+    """Tests for ensure_claude_max_auth locking."""
+
+    async def test_login_does_not_block_other_token_paths(self, tmp_path, monkeypatch):
+        """An interactive login holds only its own instance's lock."""
+        import asyncio
+        from lethe import oauth as oauth_module
+
+        login_started = asyncio.Event()
+        release_login = asyncio.Event()
+
+        async def authenticate(self):
+            login_started.set()
+            await release_login.wait()
+            return "access"
+
+        monkeypatch.setattr(ClaudeOAuth, "authenticate", authenticate)
+        monkeypatch.setattr(oauth_module, "_oauth_instances", {})
+
+        pending = asyncio.create_task(oauth_module.ensure_claude_max_auth(tmp_path / "a.json"))
+        await login_started.wait()
+
+        valid, _ = make_oauth(tmp_path, timedelta(hours=1), 200)
+        result = await asyncio.wait_for(oauth_module.ensure_claude_max_auth(valid.token_path), 1)
+        assert result.has_valid_tokens()
+        assert not pending.done()
+
+        release_login.set()
+        await pending
+        await valid.close()
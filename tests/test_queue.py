@@ -0,0 +1,135 @@
+"""Tests for the SQLite-backed task queue."""
+
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+
+from lethe.queue import TaskQueue, TaskStatus
+
+
+@pytest.fixture
+async def queue(tmp_path):
+    q = TaskQueue(tmp_path / "tasks.db")
+    await q.initialize()
+    yield q
+    await q.close()
+
+
+class TestTaskQueue:
+    """Tests for TaskQueue."""
+
+    async def test_dequeue_claims_oldest_pending(self, queue):
+        first = await queue.enqueue(chat_id=1, user_id=2, message="first")
+        await queue.enqueue(chat_id=1, user_id=2, message="second")
+
+        task = await queue.dequeue(timeout=0.1)
+
+        assert task.id == first.id
+        assert task.status == TaskStatus.RUNNING
+        assert task.started_at is not None
+        stored = await queue.get_task(first.id)
+        assert stored.status == TaskStatus.RUNNING
+        assert await queue.get_pending_count() == 1
+
+    async def test_dequeue_times_out_when_empty(self, queue):
+        assert await queue.dequeue(timeout=0.05) is None
+
+    async def test_concurrent_dequeue_claims_each_task_once(self, queue):
+        for i in range(5):
+            await queue.enqueue(chat_id=1, user_id=2, message=f"task {i}")
+
+        tasks = await asyncio.gather(*[queue.dequeue(timeout=0.1) for _ in range(7)])
+        claimed = [t.id for t in tasks if t]
+
+        assert len(claimed) == 5
+        assert len(set(claimed)) == 5
+
+    async def test_dequeue_wakes_on_enqueue(self, queue):
+        waiter = asyncio.create_task(queue.dequeue(timeout=2.0))
+        await asyncio.sleep(0.05)
+        created = await queue.enqueue(chat_id=1, user_id=2, message="hello")
+
+        task = await waiter
+        assert task.id == created.id
+
+    async def test_complete_and_fail(self, queue):
+        a = await queue.enqueue(chat_id=1, user_id=2, message="a")
+        b = await queue.enqueue(chat_id=1, user_id=2, message="b")
+
+        await queue.complete(a.id, "done")
+        await queue.fail(b.id, "boom")
+
+        done = await queue.get_task(a.id)
+        failed = await queue.get_task(b.id)
+        assert done.status == TaskStatus.COMPLETED
+        assert done.result == "done"
+        assert failed.status == TaskStatus.FAILED
+        assert failed.error == "boom"
+
+    async def test_metadata_round_trip(self, queue):
+        created = await queue.enqueue(chat_id=1, user_id=2, message="m", metadata={"k": [1, 2]})
+        plain = await queue.enqueue(chat_id=1, user_id=2, message="p")
+
+        assert (await queue.get_task(created.id)).metadata == {"k": [1, 2]}
+        assert (await queue.get_task(plain.id)).metadata == {}
+
+    async def test_task_ids_are_time_ordered_uuid7(self, queue):
+        first = await queue.enqueue(chat_id=1, user_id=2, message="a")
+        await asyncio.sleep(0.002)
+        second = await queue.enqueue(chat_id=1, user_id=2, message="b")
+
+        assert uuid.UUID(first.id).version == 7
+        assert first.id < second.id
+
+    async def test_get_stats_counts_every_status(self, queue):
+        a = await queue.enqueue(chat_id=1, user_id=2, message="a")
+        await queue.enqueue(chat_id=1, user_id=2, message="b")
+        await queue.complete(a.id, "ok")
+
+        stats = await queue.get_stats()
+
+        assert stats == {"pending": 1, "running": 0, "completed": 1, "failed": 0}
+
+    async def test_get_task_cache_is_invalidated_on_write(self, queue):
+        created = await queue.enqueue(chat_id=1, user_id=2, message="a")
+
+        first = await queue.get_task(created.id)
+        assert await queue.get_task(created.id) is first
+
+        await queue.dequeue(timeout=0.1)
+        assert (await queue.get_task(created.id)).status == TaskStatus.RUNNING
+
+        await queue.complete(created.id, "ok")
+        assert (await queue.get_task(created.id)).status == TaskStatus.COMPLETED
+
+    async def test_enqueue_wakes_one_waiter_per_task(self, queue):
+        waiters = [asyncio.create_task(queue.dequeue(timeout=0.3)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        created = await queue.enqueue(chat_id=1, user_id=2, message="only one")
+
+        results = await asyncio.gather(*waiters)
+
+        assert [t.id for t in results if t] == [created.id]
+
+    async def test_timestamps_are_timezone_aware(self, queue):
+        created = await queue.enqueue(chat_id=1, user_id=2, message="a")
+        task = await queue.dequeue(timeout=0.1)
+        await queue.complete(created.id, "ok")
+        done = await queue.get_task(created.id)
+
+        assert task.started_at.tzinfo is not None
+        assert done.completed_at.tzinfo is not None
+        assert done.created_at <= done.completed_at + timedelta(seconds=1)
+
+    async def test_dequeue_batch_claims_up_to_limit(self, queue):
+        created = [await queue.enqueue(chat_id=1, user_id=2, message=f"t{i}") for i in range(4)]
+
+        batch = await queue.dequeue_batch(3)
+
+        assert [t.id for t in batch] == [t.id for t in created[:3]]
+        assert all(t.status == TaskStatus.RUNNING for t in batch)
+        assert await queue.get_pending_count() == 1
+        assert [t.id for t in await queue.dequeue_batch(5)] == [created[3].id]
+        assert await queue.dequeue_batch(5) == []
@@ -0,0 +1,153 @@
+"""Tests for Telegram message helpers."""
+
+import asyncio
+from types import SimpleNamespace
+
+from lethe.telegram import MessageCoalescer, _AuthMiddleware, _split_message
+
+
+class TestSplitMessage:
+    """Tests for _split_message."""
+
+    def test_short_message_unchanged(self):
+        assert _split_message("hello", 10) == ["hello"]
+
+    def test_splits_on_newline(self):
+        text = "aaaa\nbbbb\ncccc"
+        assert _split_message(text, 10) == ["aaaa\nbbbb", "cccc"]
+
+    def test_falls_back_to_space(self):
+        text = "aaaa bbbb cccc"
+        assert _split_message(text, 10) == ["aaaa bbbb", "cccc"]
+
+    def test_hard_cuts_long_runs(self):
+        text = "x" * 25
+        chunks = _split_message(text, 10)
+        assert chunks == ["x" * 10, "x" * 10, "x" * 5]
+
+    def test_chunks_within_limit(self):
+        text = "\n".join("word " * n for n in range(200))
+        chunks = _split_message(text, 100)
+        assert all(len(c) <= 100 for c in chunks)
+        assert "".join(chunks).replace("\n", "").replace(" ", "") == text.replace("\n", "").replace(" ", "")
+
+
+class TestMessageCoalescer:
+    """Tests for MessageCoalescer."""
+
+    async def test_batches_messages_queued_during_a_send(self):
+        sent = []
+        gate = asyncio.Event()
+
+        async def send(text):
+            sent.append(text)
+            await gate.wait()
+
+        outgoing = MessageCoalescer(send, max_length=20)
+        outgoing.add("first")
+        await asyncio.sleep(0)
+        for text in ("second", "third", "x" * 15):
+            outgoing.add(text)
+        gate.set()
+        await outgoing.flush()
+
+        assert sent == ["first", "second\n\nthird", "x" * 15]
+
+    async def test_discard_drops_pending(self):
+        sent = []
+
+        async def send(text):
+            sent.append(text)
+
+        outgoing = MessageCoalescer(send)
+        outgoing.add("one")
+        outgoing.add("two")
+        outgoing.discard()
+        await outgoing.flush()
+
+        assert sent == []
+
+    async def test_cancelled_run_drops_pending_updates(self):
+        """Cancelling the producer (/stop) must not deliver queued updates later."""
+        sent = []
+        gate = asyncio.Event()
+
+        async def send(text):
+            sent.append(text)
+            await gate.wait()
+
+        outgoing = MessageCoalescer(send)
+
+        async def run():
+            try:
+                outgoing.add("step 1")
+                await asyncio.sleep(0)
+                outgoing.add("step 2")
+                await asyncio.Event().wait()  # agent still working
+            finally:
+                outgoing.discard()
+
+        task = asyncio.create_task(run())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        gate.set()
+        await outgoing.flush()
+        await asyncio.sleep(0.01)
+
+        assert sent == ["step 1"]
+
+    async def test_send_failure_is_not_raised(self):
+        """A failed send is logged and later messages still go out."""
+        sent = []
+
+        async def send(text):
+            if text == "bad":
+                raise RuntimeError("network down")
+            sent.append(text)
+
+        outgoing = MessageCoalescer(send, max_length=3)
+        outgoing.add("bad")
+        outgoing.add("ok")
+        await outgoing.flush()
+
+        assert sent == ["ok"]
+
+
+class TestAuthMiddleware:
+    """Tests for _AuthMiddleware."""
+
+    @staticmethod
+    def make_message(user_id, replies, **fields):
+        async def answer(text):
+            replies.append(text)
+
+        message = {"text": None, "photo": None, "document": None, **fields}
+        return SimpleNamespace(from_user=SimpleNamespace(id=user_id), answer=answer, **message)
+
+    async def run(self, message):
+        handled = []
+
+        async def handler(event, data):
+            handled.append(event)
+
+        await _AuthMiddleware(frozenset({1}))(handler, message, {})
+        return handled
+
+    async def test_authorized_user_reaches_handler(self):
+        replies = []
+        message = self.make_message(1, replies, text="hi")
+        assert await self.run(message) == [message]
+        assert replies == []
+
+    async def test_unauthorized_text_is_answered(self):
+        replies = []
+        assert await self.run(self.make_message(2, replies, text="hi")) == []
+        assert replies == ["Unauthorized."]
+
+    async def test_unauthorized_unhandled_update_is_dropped_silently(self):
+        """Updates no handler answered (stickers, /status, ...) get no reply."""
+        replies = []
+        for fields in ({"sticker": object()}, {"text": "/status"}, {"text": "/stop@lethe_bot"}):
+            assert await self.run(self.make_message(2, replies, **fields)) == []
+        assert replies == []
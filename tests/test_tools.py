@@ -121,6 +121,22 @@ class TestWriteFile:
             
             os.unlink(f.name)
 
+    def test_write_keeps_mode_and_leaves_no_temp_files(self):
+        """Overwriting should keep permissions and not leave temp files behind."""
+        from lethe.tools.filesystem import write_file
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "script.sh")
+            write_file(filepath, "echo one\n")
+            os.chmod(filepath, 0o755)
+
+            write_file(filepath, "echo two\n")
+
+            assert os.stat(filepath).st_mode & 0o777 == 0o755
+            assert os.listdir(tmpdir) == ["script.sh"]
+            with open(filepath) as f:
+                assert f.read() == "echo two\n"
+
 
 class TestEditFile:
     """Tests for edit_file tool."""
@@ -324,6 +340,39 @@ class TestGrepSearch:
             
             assert "code.py" in result
             assert "text.txt" not in result
+    
+    def test_grep_line_numbers_and_binary_skip(self):
+        """Should report correct line numbers and skip binary files."""
+        from lethe.tools.filesystem import grep_search
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Path(tmpdir, "log.txt").write_text("a\nneedle one\nb\r\nc\nneedle two\n")
+            Path(tmpdir, "blob.bin").write_bytes(b"\0\x01needle\n")
+            Path(tmpdir, "mod.pyc").write_bytes(b"needle pyc\n")
+            
+            result = grep_search(r"needle \w+$", tmpdir)
+            
+            assert "log.txt:2: needle one" in result
+            assert "log.txt:5: needle two" in result
+            assert "blob.bin" not in result
+            assert "mod.pyc" not in result
+            assert "Found 2 matches" in result
+    
+    def test_grep_searches_all_dirs_but_skips_hidden_files(self):
+        """Should descend into every directory (like rglob) but skip dotfiles."""
+        from lethe.tools.filesystem import grep_search
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for sub in (".git", "node_modules", "src"):
+                Path(tmpdir, sub).mkdir()
+                Path(tmpdir, sub, "a.txt").write_text("needle\n")
+                Path(tmpdir, sub, ".hidden").write_text("needle\n")
+            
+            result = grep_search("needle", tmpdir)
+            
+            assert "Found 3 matches in 3 files" in result
+            for sub in (".git", "node_modules", "src"):
+                assert f"{sub}/a.txt:1: needle" in result
 
 
 # ============================================================================
@@ -380,6 +429,29 @@ class TestBash:
         result = bash("echo error >&2")
         assert "error" in result
 
+    @pytest.mark.parametrize("command", [
+        "seq 1 20000",
+        "seq 1 2000",
+        "seq 1 2001",
+        "printf '\\n\\n'; seq 1 30000; printf '\\n%.0s' $(seq 1 3000)",
+        "seq 1 5000; seq 1 3 >&2",
+        "echo out; seq 1 4000 >&2",
+        "python3 -c \"print('\\u00e9' * 60000)\"",
+    ])
+    def test_long_output_matches_full_truncation(self, command):
+        """Streamed foreground output should truncate exactly like the whole text."""
+        import subprocess
+        from lethe.tools.cli import _run_foreground, _truncate_output
+
+        full = subprocess.run(command, shell=True, capture_output=True, text=True)
+        if full.stdout and full.stderr:
+            expected = f"{full.stdout}\n--- stderr ---\n{full.stderr}".strip()
+        else:
+            expected = (full.stdout or full.stderr).strip()
+
+        result = _run_foreground(command, os.getcwd(), dict(os.environ), 30)
+        assert result == _truncate_output(expected)
+
 
 class TestBashOutput:
     """Tests for bash_output tool."""
@@ -401,12 +473,121 @@ class TestBashOutput:
         result = bash_output(shell_id)
         assert "hello" in result or "no output" in result.lower()
     
+    def test_long_lines_span_reads(self):
+        """Lines longer than one pipe read should come through whole."""
+        import subprocess
+        from lethe.tools.cli import _pump_background
+        from lethe.tools.process_manager import BackgroundProcess
+        
+        process = subprocess.Popen(
+            "head -c 3000000 /dev/zero | tr '\\0' a; printf 'x\\r\\ny\\nz'",
+            shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        bg_proc = BackgroundProcess(process=process, command="test")
+        _pump_background(process, bg_proc, timeout=30)
+        
+        assert list(bg_proc.stdout) == ["a" * 3000000 + "x", "y", "z"]
+        assert bg_proc.status == "completed"
+    
     def test_nonexistent_shell(self):
         """Should return error for nonexistent shell."""
         from lethe.tools.cli import bash_output
         
         result = bash_output("nonexistent_shell")
         assert "No background process" in result
+    
+    def test_filter_and_last_lines(self):
+        """Should filter and tail across stdout and stderr."""
+        from lethe.tools.cli import bash_output
+        from lethe.tools.process_manager import BackgroundProcess, register_process, remove_process
+        
+        proc = BackgroundProcess(
+            process=None,
+            command="test",
+            stdout=["out 1", "out 2", "out 3"],
+            stderr=["err 1", "err 2"],
+            status="completed",
+        )
+        register_process("bash_test_tail", proc)
+        try:
+            assert bash_output("bash_test_tail") == "out 1\nout 2\nout 3\nerr 1\nerr 2"
+            assert bash_output("bash_test_tail", last_lines=3) == "... [2 earlier lines]\nout 3\nerr 1\nerr 2"
+            assert bash_output("bash_test_tail", last_lines=1) == "... [4 earlier lines]\nerr 2"
+            assert bash_output("bash_test_tail", filter_pattern="out", last_lines=2) == "... [1 earlier lines]\nout 2\nout 3"
+            assert bash_output("bash_test_tail", last_lines=10) == "out 1\nout 2\nout 3\nerr 1\nerr 2"
+        finally:
+            remove_process("bash_test_tail")
+    
+    def test_output_retention_is_bounded(self):
+        """Background output buffers should drop the oldest lines past the cap."""
+        from lethe.tools.process_manager import BackgroundProcess, MAX_OUTPUT_LINES
+        
+        proc = BackgroundProcess(process=None, command="test")
+        proc.stdout.extend(str(i) for i in range(MAX_OUTPUT_LINES + 10))
+        assert len(proc.stdout) == MAX_OUTPUT_LINES
+        assert proc.stdout[0] == "10"
+    
+    def test_raw_output_retention_is_bounded_by_bytes(self):
+        """Raw PTY output should keep only the newest MAX_RAW_OUTPUT_BYTES bytes."""
+        from lethe.tools.process_manager import BackgroundProcess, MAX_RAW_OUTPUT_BYTES
+        
+        proc = BackgroundProcess(process=None, command="test")
+        chunk = 65536
+        for i in range(MAX_RAW_OUTPUT_BYTES // chunk + 3):
+            proc.append_raw_output(bytes([i]) * chunk)
+        
+        assert len(proc.raw_output) == MAX_RAW_OUTPUT_BYTES
+        assert proc.raw_output[-1] == i
+        assert proc.raw_output[0] == i - MAX_RAW_OUTPUT_BYTES // chunk + 1
+
+    def test_pty_flood_is_throttled_by_slow_screen(self, monkeypatch):
+        """A child outpacing the terminal emulator should block, not queue unboundedly."""
+        import threading
+        import time
+        import pyte
+        from lethe.tools.process_manager import (
+            BackgroundProcess, PTY_QUEUE_CHUNKS, create_pty_process, remove_process,
+        )
+        
+        release = threading.Event()
+        read_bytes = []
+        append_raw_output = BackgroundProcess.append_raw_output
+        
+        def stalled_feed(self, data):
+            release.wait()
+        
+        def counting_append(self, data):
+            read_bytes.append(len(data))
+            append_raw_output(self, data)
+        
+        monkeypatch.setattr(pyte.ByteStream, "feed", stalled_feed)
+        monkeypatch.setattr(BackgroundProcess, "append_raw_output", counting_append)
+        
+        shell_id, proc = create_pty_process("yes aaaaaaaaaaaaaaaaaaaaaaaaaaaaaa", os.getcwd(), os.environ.copy())
+        try:
+            time.sleep(0.5)
+            # Queue full, plus one batch in the feeder and one read in hand
+            assert sum(read_bytes) <= (PTY_QUEUE_CHUNKS + 2) * 65536
+        finally:
+            os.kill(proc.pty_pid, 9)
+            release.set()
+            remove_process(shell_id)
+    
+    def test_screen_text_tracks_updates(self):
+        """Screen text should be re-rendered only after the screen changes."""
+        import pyte
+        from lethe.tools.process_manager import BackgroundProcess
+
+        screen = pyte.Screen(20, 5)
+        stream = pyte.ByteStream(screen)
+        proc = BackgroundProcess(process=None, command="test", is_pty=True, screen=screen, stream=stream)
+
+        stream.feed(b"hello\r\nworld")
+        assert proc.get_screen_text() == "hello\nworld"
+        assert proc.get_screen_text() is proc.get_screen_text()
+
+        stream.feed(b"\r\nagain")
+        assert proc.get_screen_text() == "hello\nworld\nagain"
 
 
 class TestKillBash:
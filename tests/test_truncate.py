@@ -5,6 +5,7 @@ from lethe.tools.truncate import (
     truncate_head,
     truncate_tail,
     truncate_line,
+    TailBuffer,
     format_truncation_notice,
     format_size,
     DEFAULT_MAX_LINES,
@@ -222,5 +223,48 @@ class TestUtf8Handling:
         result.content.encode('utf-8')  # Should not raise
 
 
+class TestTailBuffer:
+    """Tests for TailBuffer (streamed bash output)."""
+    
+    def test_matches_truncating_whole_output(self):
+        """Truncating the kept tail should match truncating everything."""
+        content = "".join(f"line {i} {'é' * (i % 7)}\n" for i in range(20000))
+        buffer = TailBuffer()
+        for i in range(0, len(content), 4096):
+            buffer.feed(content[i:i + 4096])
+        
+        text, dropped_lines, dropped_bytes = buffer.section(lstrip=True, rstrip=True)
+        assert dropped_lines
+        assert len(text) <= 2 * (DEFAULT_MAX_BYTES + 1)
+        
+        result = truncate_tail(text)
+        expected = truncate_tail(content.strip())
+        assert result.content == expected.content
+        assert result.output_lines == expected.output_lines
+        assert result.total_lines + dropped_lines == expected.total_lines
+        assert result.total_bytes + dropped_bytes == expected.total_bytes
+    
+    def test_trailing_whitespace_is_bounded_and_stripped(self):
+        """A long whitespace run is windowed but still strips away."""
+        buffer = TailBuffer()
+        buffer.feed("result\n")
+        for _ in range(100):
+            buffer.feed("\n" * 10000)
+        
+        assert buffer.section(rstrip=True) == ("result", 0, 0)
+        text, dropped_lines, _ = buffer.section()
+        assert len(text) <= 2 * (DEFAULT_MAX_BYTES + 1)
+        assert text.count("\n") + dropped_lines == 1000001
+    
+    def test_short_stream_kept_whole(self):
+        """Streams within the limits are kept verbatim."""
+        buffer = TailBuffer()
+        buffer.feed("  a\nb")
+        buffer.feed("\nc \n")
+        
+        assert buffer.section() == ("  a\nb\nc \n", 0, 0)
+        assert buffer.section(lstrip=True, rstrip=True) == ("a\nb\nc", 0, 0)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])